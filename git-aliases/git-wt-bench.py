@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""Scale benchmarks for git-wt.py against synthetic many-worktree repositories.
+
+Builds throwaway repositories with N linked worktrees (a mix of clean, dirty,
+untracked-only, pushed and ahead-of-upstream), then times the hot paths of
+git-wt.py and counts the processes each one spawns. Results are printed as
+JSON so runs can be diffed, and thresholds turn regressions into a non-zero
+exit status.
+
+examples:
+  git-wt-bench.py                          10/100/500 worktrees, JSON on stdout
+  git-wt-bench.py -n 100 -o base.json      save a baseline
+  git-wt-bench.py -n 100 --baseline base.json --tolerance 1.5
+  git-wt-bench.py -n 100 --max build_rows_cold.spawns=110
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import importlib.util
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import ModuleType
+from typing import Callable, Dict, Iterator, List
+
+HERE = Path(__file__).resolve().parent
+GIT_ENV = {
+    "GIT_AUTHOR_NAME": "bench",
+    "GIT_AUTHOR_EMAIL": "bench@example.com",
+    "GIT_COMMITTER_NAME": "bench",
+    "GIT_COMMITTER_EMAIL": "bench@example.com",
+    "GIT_CONFIG_NOSYSTEM": "1",
+}
+
+
+def load_git_wt() -> ModuleType:
+    spec = importlib.util.spec_from_file_location("git_wt", HERE / "git-wt.py")
+    assert spec and spec.loader
+    mod = importlib.util.module_from_spec(spec)
+    sys.modules["git_wt"] = mod  # dataclasses look the module up by name
+    spec.loader.exec_module(mod)
+    return mod
+
+
+def run_git(*args: str, cwd: Path) -> None:
+    subprocess.run(["git", *args], cwd=cwd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+# -----------------------------------------------------------------------------
+# synthetic repositories
+# -----------------------------------------------------------------------------
+
+def build_repo(root: Path, worktrees: int, files: int) -> Path:
+    """Create origin.git + repo/ with `worktrees` linked worktrees under wt/.
+
+    Worktree i is: pushed when i % 2 == 0, ahead of its upstream when
+    i % 6 == 0, modified when i % 3 == 0 and has an untracked file when
+    i % 5 == 0. Everything else is clean.
+    """
+    origin = root / "origin.git"
+    repo = root / "repo"
+    run_git("init", "-q", "--bare", str(origin), cwd=root)
+    run_git("init", "-q", "-b", "main", str(repo), cwd=root)
+    for i in range(files):
+        sub = repo / f"pkg{i % 10}"
+        sub.mkdir(exist_ok=True)
+        (sub / f"mod{i}.txt").write_text(f"file {i}\n" * 20)
+    run_git("add", "-A", cwd=repo)
+    run_git("commit", "-q", "-m", "init", cwd=repo)
+    run_git("remote", "add", "origin", str(origin), cwd=repo)
+    run_git("config", "wt.root", str(root / "wt"), cwd=repo)
+
+    branches = [f"task-{i:04d}" for i in range(worktrees)]
+    for b in branches:
+        run_git("worktree", "add", "-q", "-b", b, str(root / "wt" / "repo" / b), cwd=repo)
+    pushed = [b for i, b in enumerate(branches) if i % 2 == 0]
+    run_git("push", "-q", "-u", "origin", "main", *pushed, cwd=repo)
+
+    for i, b in enumerate(branches):
+        wt = root / "wt" / "repo" / b
+        if i % 6 == 0:
+            run_git("commit", "-q", "--allow-empty", "-m", "ahead", cwd=wt)
+        if i % 3 == 0:
+            with open(wt / "pkg0" / "mod0.txt", "a") as f:
+                f.write("edit\n")
+        if i % 5 == 0:
+            (wt / "scratch.txt").write_text("untracked\n")
+    return repo
+
+
+# -----------------------------------------------------------------------------
+# measurement
+# -----------------------------------------------------------------------------
+
+class SpawnCounter:
+    """Counts subprocess.Popen constructions (asyncio subprocesses go through it too)."""
+
+    def __init__(self) -> None:
+        self.count = 0
+
+    @contextlib.contextmanager
+    def counting(self) -> Iterator[None]:
+        orig = subprocess.Popen.__init__
+
+        def init(popen: subprocess.Popen, *args: object, **kwargs: object) -> None:
+            self.count += 1
+            orig(popen, *args, **kwargs)  # type: ignore[arg-type]
+
+        subprocess.Popen.__init__ = init  # type: ignore[method-assign]
+        try:
+            yield
+        finally:
+            subprocess.Popen.__init__ = orig  # type: ignore[method-assign]
+
+
+def reset_caches(gw: ModuleType) -> None:
+    """Forget everything git-wt.py memoizes, as a fresh process would."""
+    gw.repo_context.cache_clear()
+    gw._config.cache_clear()
+    gw.commit_tree.cache_clear()
+    gw._open_pack.cache_clear()
+
+
+def measure(gw: ModuleType, fn: Callable[[], object]) -> Dict[str, float]:
+    reset_caches(gw)
+    counter = SpawnCounter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
+        with counter.counting():
+            t0 = time.perf_counter()
+            fn()
+            wall = time.perf_counter() - t0
+    return {"wall": round(wall, 4), "spawns": counter.count}
+
+
+def bench_repo(gw: ModuleType, repo: Path, worktrees: int) -> Dict[str, Dict[str, float]]:
+    os.chdir(repo)
+    last = f"task-{worktrees - 1:04d}"
+    cache = gw.git_common_dir() / gw.CACHE_FILE
+    cache.unlink(missing_ok=True)
+    return {
+        "worktrees": measure(gw, lambda: list(gw.worktrees())),
+        "worktree_for_branch": measure(gw, lambda: gw.worktree_for_branch(last)),
+        "build_rows_nocache": measure(gw, lambda: gw.build_rows(include_upstream=True, use_cache=False)),
+        "build_rows_cold": measure(gw, lambda: gw.build_rows(include_upstream=True)),
+        "build_rows_warm": measure(gw, lambda: gw.build_rows(include_upstream=True)),
+        "prune_dry_run": measure(gw, lambda: gw.run(gw.cmd_prune(False, dry_run=True))),
+    }
+
+
+# -----------------------------------------------------------------------------
+# thresholds
+# -----------------------------------------------------------------------------
+
+def check_thresholds(
+    report: Dict[str, dict], baseline: Dict[str, dict] | None, tolerance: float, limits: Dict[str, float]
+) -> List[str]:
+    failures: List[str] = []
+    for size, results in report["runs"].items():
+        for name, metrics in results.items():
+            for metric, value in metrics.items():
+                key = f"{name}.{metric}"
+                limit = limits.get(key)
+                if limit is not None and value > limit:
+                    failures.append(f"{size} worktrees: {key} = {value} > {limit}")
+                base = (baseline or {}).get("runs", {}).get(size, {}).get(name, {}).get(metric)
+                if base is not None and value > max(base * tolerance, base + (0.05 if metric == "wall" else 0)):
+                    failures.append(f"{size} worktrees: {key} = {value} > baseline {base} x {tolerance}")
+    return failures
+
+
+def parse_limits(specs: List[str]) -> Dict[str, float]:
+    limits: Dict[str, float] = {}
+    for spec in specs:
+        key, sep, value = spec.partition("=")
+        if not sep or key.count(".") != 1:
+            sys.exit(f"bad --max {spec!r}, expected NAME.METRIC=VALUE (e.g. build_rows_cold.spawns=110)")
+        limits[key] = float(value)
+    return limits
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(
+        description="Benchmark git-wt.py on synthetic many-worktree repositories",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__.split("\n\n", 2)[2] if __doc__ else None,
+    )
+    ap.add_argument("-n", "--worktrees", type=int, action="append", help="worktree count (repeatable; default 10, 100, 500)")
+    ap.add_argument("--files", type=int, default=200, help="tracked files per repository (default 200)")
+    ap.add_argument("-o", "--output", type=Path, help="also write the JSON report here")
+    ap.add_argument("--baseline", type=Path, help="earlier report to compare against")
+    ap.add_argument("--tolerance", type=float, default=1.5, help="allowed slowdown vs baseline (default 1.5x)")
+    ap.add_argument("--max", action="append", default=[], metavar="NAME.METRIC=VALUE", help="absolute limit, repeatable")
+    ap.add_argument("--keep", action="store_true", help="keep the generated repositories")
+    args = ap.parse_args()
+
+    sizes = args.worktrees or [10, 100, 500]
+    limits = parse_limits(args.max)
+    baseline = json.loads(args.baseline.read_text()) if args.baseline else None
+    os.environ.update(GIT_ENV)
+    gw = load_git_wt()
+    cwd = Path.cwd()
+
+    report: Dict[str, dict] = {"files": args.files, "cpus": os.cpu_count(), "runs": {}}
+    for n in sizes:
+        tmp = Path(tempfile.mkdtemp(prefix=f"gwt-bench-{n}-"))
+        try:
+            t0 = time.perf_counter()
+            repo = build_repo(tmp, n, args.files)
+            print(f"built {n} worktrees in {time.perf_counter() - t0:.1f}s ({tmp})", file=sys.stderr)
+            report["runs"][str(n)] = bench_repo(gw, repo, n)
+        finally:
+            os.chdir(cwd)
+            if not args.keep:
+                shutil.rmtree(tmp, ignore_errors=True)
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        args.output.write_text(text + "\n")
+
+    failures = check_thresholds(report, baseline, args.tolerance, limits)
+    for f in failures:
+        print(f"FAIL {f}", file=sys.stderr)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
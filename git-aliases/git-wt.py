@@ -2,15 +2,36 @@
 from __future__ import annotations
 
 import argparse
+import asyncio
+import atexit
+import bisect
+import contextlib
+import ctypes
+import ctypes.util
+import errno
+import fcntl
+import json
+import mmap
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 import re
 import shutil
 import subprocess
 import sys
 import shlex
+import signal
+import stat
+import struct
+import tempfile
+import threading
 import os
-import concurrent.futures
+import random
+import functools
+import hashlib
+import time
+import zlib
+from dataclasses import asdict, dataclass
 from pathlib import Path
-from typing import Iterable, List, Tuple
+from typing import IO, AsyncIterator, Awaitable, Callable, Coroutine, Dict, Iterable, Iterator, List, Tuple, TypeVar
 
 # -----------------------------------------------------------------------------
 # ANSI colors
@@ -27,11 +48,97 @@ class C:
 
 BRAILE_SPACE="⠀"
 
+T = TypeVar("T")
+
 # -----------------------------------------------------------------------------
 # subprocess helpers
 # -----------------------------------------------------------------------------
 
+@dataclass
+class TraceEvent:
+    argv: List[str]
+    cwd: str
+    subcommand: str
+    start: float  # seconds since the tracer started
+    lane: int  # smallest slot free at start; concurrent calls get distinct lanes
+    duration: float = 0.0
+    returncode: int | None = None
+
+
+class Tracer:
+    """Records every process git-wt spawns, for --profile."""
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.subcommand = "-"
+        self.events: List[TraceEvent] = []
+        self._busy: List[bool] = []
+        self._lock = threading.Lock()
+        self._t0 = time.perf_counter()
+
+    def start(self, cmd: List[str], cwd: Path | None) -> TraceEvent | None:
+        if not self.enabled:
+            return None
+        with self._lock:
+            lane = next((i for i, busy in enumerate(self._busy) if not busy), len(self._busy))
+            if lane == len(self._busy):
+                self._busy.append(True)
+            self._busy[lane] = True
+            ev = TraceEvent(list(cmd), str(cwd or Path.cwd()), self.subcommand, time.perf_counter() - self._t0, lane)
+            self.events.append(ev)
+        return ev
+
+    def finish(self, ev: TraceEvent | None, returncode: int | None) -> None:
+        if ev is None:
+            return
+        with self._lock:
+            ev.duration = time.perf_counter() - self._t0 - ev.start
+            ev.returncode = returncode
+            self._busy[ev.lane] = False
+
+    def report(self, top: int = 10) -> str:
+        wall = time.perf_counter() - self._t0
+        busy = sum(ev.duration for ev in self.events)
+        lines = [
+            f"profile [{self.subcommand}]: {len(self.events)} processes, "
+            f"{wall:.3f}s wall, {busy:.3f}s in subprocesses, {len(self._busy)} max concurrent"
+        ]
+        by_cmd: Dict[str, List[float]] = {}
+        for ev in self.events:
+            by_cmd.setdefault(" ".join(ev.argv[:2]), []).append(ev.duration)
+        for name, durs in sorted(by_cmd.items(), key=lambda kv: -sum(kv[1])):
+            lines.append(f"  {len(durs):4d}x {sum(durs):7.3f}s  {name}")
+        lines.append("slowest:")
+        for ev in sorted(self.events, key=lambda e: -e.duration)[:top]:
+            rc = "" if ev.returncode == 0 else f" {C.RED}[exit {ev.returncode}]{C.RESET}"
+            lines.append(f"  {ev.duration:7.3f}s  {shlex.join(ev.argv)}  {C.DIM}{relpath(Path(ev.cwd))}{C.RESET}{rc}")
+        return "\n".join(lines)
+
+    def chrome_trace(self) -> dict:
+        """Trace Event Format, loadable in chrome://tracing or Perfetto; one track per lane."""
+        return {
+            "traceEvents": [
+                {
+                    "name": " ".join(ev.argv[:2]),
+                    "cat": ev.subcommand,
+                    "ph": "X",
+                    "ts": round(ev.start * 1e6),
+                    "dur": round(ev.duration * 1e6),
+                    "pid": os.getpid(),
+                    "tid": ev.lane,
+                    "args": {"argv": ev.argv, "cwd": ev.cwd, "exit": ev.returncode},
+                }
+                for ev in self.events
+            ],
+            "displayTimeUnit": "ms",
+        }
+
+
+TRACER = Tracer()
+
+
 def sh(cmd: List[str], *, cwd: Path | None = None, check: bool = True) -> str:
+    ev = TRACER.start(cmd, cwd)
     p = subprocess.run(
         cmd,
         cwd=cwd,
@@ -39,6 +146,7 @@ def sh(cmd: List[str], *, cwd: Path | None = None, check: bool = True) -> str:
         stdout=subprocess.PIPE,
         stderr=subprocess.PIPE,
     )
+    TRACER.finish(ev, p.returncode)
     if check and p.returncode != 0:
         sys.stderr.write(p.stderr)
         sys.exit(p.returncode)
@@ -49,21 +157,198 @@ def git(*args: str, cwd: Path | None = None, check: bool = True) -> str:
     return sh(["git", *args], cwd=cwd, check=check)
 
 
+def spawn_detached(*args: str) -> None:
+    """Start `git-wt.py args...` in its own session, outliving this process."""
+    subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), *args],
+        cwd=main_worktree(),
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+
 def require(cmd: str) -> None:
     if shutil.which(cmd) is None:
         sys.exit(f"{cmd} not found")
 
 
+# -----------------------------------------------------------------------------
+# async git engine
+# -----------------------------------------------------------------------------
+
+GIT_TIMEOUT = 30.0  # seconds, for read-only queries; mutations run unbounded
+
+_budget: asyncio.Semaphore | None = None
+
+
+def max_jobs() -> int:
+    jobs = config_get("wt.jobs")
+    if jobs and jobs.isdigit() and int(jobs) > 0:
+        return int(jobs)
+    return min(32, (os.cpu_count() or 4) * 2)
+
+
+def budget() -> asyncio.Semaphore:
+    """Process-wide cap on concurrently running git processes."""
+    global _budget
+    if _budget is None:
+        _budget = asyncio.Semaphore(max_jobs())
+    return _budget
+
+
+def run(coro: Coroutine[object, object, T]) -> T:
+    """Run a subcommand on a fresh event loop (and a budget bound to it)."""
+    global _budget
+    _budget = None
+    return asyncio.run(coro)
+
+
+async def run_cmd(
+    cmd: List[str], *, cwd: Path | None = None, timeout: float | None = GIT_TIMEOUT, input: str | None = None
+) -> subprocess.CompletedProcess[str]:
+    """Run a command within the budget. Timeouts and cancellation kill the process."""
+    async with budget():
+        ev = TRACER.start(cmd, cwd)
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            cwd=cwd,
+            stdin=subprocess.PIPE if input is not None else None,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+        try:
+            out, err = await asyncio.wait_for(
+                proc.communicate(input.encode() if input is not None else None), timeout
+            )
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            with contextlib.suppress(ProcessLookupError):
+                proc.kill()
+            await proc.wait()
+            TRACER.finish(ev, proc.returncode)
+            if isinstance(e, asyncio.TimeoutError):
+                raise subprocess.TimeoutExpired(cmd, timeout or 0) from None
+            raise
+        TRACER.finish(ev, proc.returncode)
+    assert proc.returncode is not None
+    return subprocess.CompletedProcess(cmd, proc.returncode, out.decode(), err.decode())
+
+
+async def ash(
+    cmd: List[str],
+    *,
+    cwd: Path | None = None,
+    check: bool = True,
+    timeout: float | None = GIT_TIMEOUT,
+    input: str | None = None,
+) -> str:
+    p = await run_cmd(cmd, cwd=cwd, timeout=timeout, input=input)
+    if check and p.returncode != 0:
+        sys.stderr.write(p.stderr)
+        sys.exit(p.returncode)
+    return p.stdout.rstrip("\n")
+
+
+async def agit(
+    *args: str, cwd: Path | None = None, check: bool = True, timeout: float | None = GIT_TIMEOUT
+) -> str:
+    return await ash(["git", *args], cwd=cwd, check=check, timeout=timeout)
+
+
+async def ref_exists(ref: str) -> bool:
+    snap = ref_snapshot()
+    if snap is not None:
+        return ref in snap.refs
+    p = await run_cmd(["git", "show-ref", "--verify", "--quiet", ref])
+    return p.returncode == 0
+
+
+async def qualify_ref(name: str) -> str | None:
+    """Full ref for a branch, remote branch or tag name, in that order of preference."""
+    snap = ref_snapshot()
+    if snap is not None:
+        return snap.qualify(name)
+    candidates = [f"{ns}{name}" for ns in REF_NAMESPACES]
+    found = await asyncio.gather(*(ref_exists(ref) for ref in candidates))
+    return next((ref for ref, ok in zip(candidates, found) if ok), None)
+
+
 # -----------------------------------------------------------------------------
 # repo / path helpers
 # -----------------------------------------------------------------------------
 
+def _read_text(path: Path) -> str | None:
+    try:
+        return path.read_text().strip()
+    except OSError:
+        return None
+
+
+def _worktree_git_dir(path: Path) -> Path | None:
+    """Resolve the private git dir of a worktree from its .git file or directory."""
+    dot_git = path / ".git"
+    if dot_git.is_dir():
+        return dot_git
+    content = _read_text(dot_git)
+    if not content or not content.startswith("gitdir:"):
+        return None
+    return (path / content.split(":", 1)[1].strip()).resolve()
+
+
+@dataclass(frozen=True)
+class RepoContext:
+    toplevel: Path  # worktree containing the cwd
+    git_dir: Path  # its private git dir (.git or .git/worktrees/<id>)
+    common_dir: Path  # the shared .git directory
+
+
+# Any of these changes how git discovers the repository; defer to git itself.
+_GIT_DISCOVERY_ENV = ("GIT_DIR", "GIT_WORK_TREE", "GIT_COMMON_DIR", "GIT_CEILING_DIRECTORIES")
+
+
+def _discover_context() -> RepoContext | None:
+    """Find the repository by walking up from the cwd, like git does, without forking."""
+    if any(v in os.environ for v in _GIT_DISCOVERY_ENV):
+        return None
+    cwd = Path.cwd().resolve()
+    for d in (cwd, *cwd.parents):
+        if (d / "HEAD").is_file() and (d / "objects").is_dir():
+            return None  # inside a git dir or bare repo
+        if not (d / ".git").exists():
+            continue
+        gitdir = _worktree_git_dir(d)
+        if gitdir is None or not (gitdir / "HEAD").is_file():
+            return None
+        rel = _read_text(gitdir / "commondir")
+        common = (gitdir / rel).resolve() if rel else gitdir
+        return RepoContext(d, gitdir, common)
+    return None
+
+
+@functools.lru_cache(maxsize=None)
+def repo_context() -> RepoContext:
+    ctx = _discover_context()
+    if ctx is None:
+        top = Path(git("rev-parse", "--show-toplevel")).resolve()
+        git_dir, common_dir = git("rev-parse", "--git-dir", "--git-common-dir").splitlines()
+        ctx = RepoContext(top, (Path.cwd() / git_dir).resolve(), (Path.cwd() / common_dir).resolve())
+    return ctx
+
+
 def repo_root() -> Path:
-    return Path(git("rev-parse", "--show-toplevel")).resolve()
+    return repo_context().toplevel
+
+
+def git_common_dir() -> Path:
+    return repo_context().common_dir
 
 
 def main_worktree() -> Path:
     """Get the main worktree (where .git is a directory, not a file)."""
+    common = git_common_dir()
+    if common.name == ".git" and common.is_dir():
+        return common.parent
     out = git("worktree", "list", "--porcelain")
     for line in out.splitlines():
         if line.startswith("worktree "):
@@ -78,11 +363,130 @@ def repo_name() -> str:
 
 
 def worktree_base() -> Path:
-    root = git("config", "--get", "wt.root", check=False)
+    root = config_get("wt.root")
     base = Path(root).expanduser().resolve() if root else repo_root().parent
     return base / repo_name()
 
 
+def shared_base() -> Path:
+    """worktree_base() as seen from the main worktree, the same from every worktree.
+
+    Home of the pool and the trash, which background processes started in
+    the main worktree have to find.
+    """
+    root = config_get("wt.root")
+    main = main_worktree()
+    base = Path(root).expanduser().resolve() if root else main.parent
+    return base / main.name
+
+
+# -----------------------------------------------------------------------------
+# git config reader
+# -----------------------------------------------------------------------------
+
+_SECTION_RE = re.compile(r'^\[\s*([A-Za-z0-9.-]+)(?:\s+"((?:[^"\\]|\\.)*)")?\s*\]\s*(?:[#;].*)?$')
+_CONFIG_ESCAPES = {"n": "\n", "t": "\t", "b": "\b"}
+
+
+def _config_value(raw: str) -> str:
+    out: List[str] = []
+    quoted = False
+    i = 0
+    while i < len(raw):
+        c = raw[i]
+        if c == '"':
+            quoted = not quoted
+        elif c == "\\" and i + 1 < len(raw):
+            i += 1
+            out.append(_CONFIG_ESCAPES.get(raw[i], raw[i]))
+        elif c in "#;" and not quoted:
+            break
+        else:
+            out.append(c)
+        i += 1
+    return "".join(out).strip()
+
+
+def _parse_config(path: Path, into: Dict[str, List[str]]) -> bool:
+    """Merge one config file into `into`. Returns False for anything this reader doesn't handle."""
+    try:
+        text = path.read_text()
+    except FileNotFoundError:
+        return True
+    except OSError:
+        return False
+    section = ""
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line or line[0] in "#;":
+            continue
+        if line.startswith("["):
+            m = _SECTION_RE.match(line)
+            if not m or m.group(1).lower() in ("include", "includeif"):
+                return False
+            name, sub = m.groups()
+            section = name.lower() if sub is None else f"{name.lower()}.{sub}"
+            continue
+        if line.endswith("\\"):
+            return False  # continuation lines
+        key, eq, value = line.partition("=")
+        into.setdefault(f"{section}.{key.strip().lower()}", []).append(_config_value(value) if eq else "true")
+    return True
+
+
+@functools.lru_cache(maxsize=None)
+def _config() -> Dict[str, List[str]] | None:
+    """All config values in git's precedence order, or None to fall back to `git config`."""
+    # These only pick which files to read; anything else (GIT_CONFIG_COUNT,
+    # GIT_CONFIG_PARAMETERS from `git -c`) injects values we'd miss.
+    file_vars = ("GIT_CONFIG_NOSYSTEM", "GIT_CONFIG_SYSTEM", "GIT_CONFIG_GLOBAL")
+    if any(k.startswith("GIT_CONFIG") and k not in file_vars for k in os.environ):
+        return None
+    ctx = repo_context()
+    files: List[Path] = []
+    if not os.environ.get("GIT_CONFIG_NOSYSTEM"):
+        files.append(Path(os.environ.get("GIT_CONFIG_SYSTEM") or "/etc/gitconfig"))
+    if "GIT_CONFIG_GLOBAL" in os.environ:
+        files.append(Path(os.environ["GIT_CONFIG_GLOBAL"]))
+    else:
+        xdg = Path(os.environ.get("XDG_CONFIG_HOME") or Path.home() / ".config")
+        files += [xdg / "git" / "config", Path.home() / ".gitconfig"]
+    files += [ctx.common_dir / "config", ctx.git_dir / "config.worktree"]
+    values: Dict[str, List[str]] = {}
+    for f in files:
+        if not _parse_config(f, values):
+            return None
+    return values
+
+
+def _config_key(key: str) -> str:
+    # section and variable names are case-insensitive, subsections are not
+    section, _, name = key.rpartition(".")
+    first, dot, sub = section.partition(".")
+    return f"{first.lower()}{dot}{sub}.{name.lower()}"
+
+
+def config_get(key: str) -> str | None:
+    cfg = _config()
+    if cfg is None:
+        return git("config", "--get", key, check=False) or None
+    values = cfg.get(_config_key(key))
+    return values[-1] if values else None
+
+
+def config_list(key: str) -> List[str]:
+    """Every value of a multi-valued key, lowest precedence first."""
+    cfg = _config()
+    if cfg is None:
+        out = git("config", "--get-all", key, check=False)
+        return out.splitlines() if out else []
+    return list(cfg.get(_config_key(key), []))
+
+
+def config_bool(key: str) -> bool:
+    return (config_get(key) or "").lower() in ("true", "yes", "on", "1")
+
+
 # -----------------------------------------------------------------------------
 # formatting helpers
 # -----------------------------------------------------------------------------
@@ -132,7 +536,38 @@ def relpath(p: Path) -> str:
 # git worktree model
 # -----------------------------------------------------------------------------
 
+def _head_branch(git_dir: Path) -> str | None:
+    head = _read_text(git_dir / "HEAD") or ""
+    return head.removeprefix("ref: refs/heads/") if head.startswith("ref: refs/heads/") else None
+
+
+def _worktrees_from_disk() -> List[Tuple[Path, str | None]] | None:
+    """Read the worktree list from the admin dirs under .git/worktrees, main worktree first."""
+    common = git_common_dir()
+    if common.name != ".git":
+        return None  # bare repo or separate git dir
+    listing: List[Tuple[Path, str | None]] = [(common.parent, _head_branch(common))]
+    try:
+        admin_dirs = sorted(os.scandir(common / "worktrees"), key=lambda e: e.name)
+    except FileNotFoundError:
+        admin_dirs = []
+    for entry in admin_dirs:
+        admin = Path(entry.path)
+        gitdir = _read_text(admin / "gitdir")
+        if not gitdir:
+            continue
+        listing.append(((admin / gitdir).parent, _head_branch(admin)))
+    return listing
+
+
 def worktrees() -> Iterable[Tuple[Path, str]]:
+    listing = _worktrees_from_disk()
+    if listing is not None:
+        for wt, branch in listing:
+            if branch is not None:
+                yield wt, branch
+        return
+
     out = git("worktree", "list", "--porcelain")
     wt: Path | None = None
     for line in out.splitlines():
@@ -141,6 +576,7 @@ def worktrees() -> Iterable[Tuple[Path, str]]:
         elif line.startswith("branch ") and wt:
             yield wt, line.split()[1].removeprefix("refs/heads/")
 
+
 def worktree_for_branch(branch: str) -> Path | None:
     for path, b in worktrees():
         if b == branch:
@@ -161,75 +597,492 @@ def copy_env_files(dest: Path) -> None:
             if not target.exists():
                 os.symlink(env_file.resolve(), target)
 
+# -----------------------------------------------------------------------------
+# dependency provisioning
+# -----------------------------------------------------------------------------
+
+PROVISION_DEFAULT = ["node_modules"]
+PROVISION_MODES = ("auto", "reflink", "hardlink", "copy")
+FICLONE = 0x40049409  # linux/fs.h: _IOW(0x94, 9, int)
+CLONE_NOFOLLOW = 0x0001  # sys/clonefile.h
+_NO_REFLINK = (errno.EOPNOTSUPP, errno.ENOTSUP, errno.ENOTTY, errno.EXDEV, errno.EINVAL, errno.ENOSYS)
+
+
+@functools.lru_cache(maxsize=None)
+def _clonefile() -> Callable[..., int] | None:
+    """libc clonefile(2), macOS 10.12+; None elsewhere."""
+    if sys.platform != "darwin":
+        return None
+    fn = getattr(ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True), "clonefile", None)
+    if fn is not None:
+        fn.argtypes = [ctypes.c_char_p, ctypes.c_char_p, ctypes.c_uint32]
+    return fn
+
+
+def _reflink(src: str, dst: str) -> bool:
+    """Clone src into a new dst sharing its extents. False if the filesystem can't.
+
+    FICLONE on Linux (btrfs, XFS, bcachefs), clonefile(2) on macOS (APFS).
+    """
+    if sys.platform == "darwin":
+        clonefile = _clonefile()
+        if clonefile is None:
+            return False
+        if clonefile(os.fsencode(src), os.fsencode(dst), CLONE_NOFOLLOW) == 0:
+            return True  # clonefile carries mode and timestamps over itself
+        err = ctypes.get_errno()
+        if err in _NO_REFLINK:
+            return False
+        raise OSError(err, os.strerror(err), dst)
+    with open(src, "rb") as fs:
+        fd = os.open(dst, os.O_WRONLY | os.O_CREAT | os.O_EXCL, os.fstat(fs.fileno()).st_mode & 0o7777)
+        try:
+            fcntl.ioctl(fd, FICLONE, fs.fileno())
+        except OSError as e:
+            os.close(fd)
+            os.unlink(dst)
+            if e.errno in _NO_REFLINK:
+                return False
+            raise
+        os.close(fd)
+    shutil.copystat(src, dst)
+    return True
+
+
+def _hardlink(src: str, dst: str) -> bool:
+    try:
+        os.link(src, dst)
+    except OSError as e:
+        if e.errno in (errno.EXDEV, errno.EPERM, errno.EMLINK):
+            return False
+        raise
+    return True
+
+
+def _copy(src: str, dst: str) -> bool:
+    shutil.copy2(src, dst)
+    return True
+
+
+_PROVISION_FNS: Dict[str, Callable[[str, str], bool]] = {"reflink": _reflink, "hardlink": _hardlink, "copy": _copy}
+
+
+@dataclass
+class ProvisionStats:
+    files: int = 0
+    bytes: int = 0
+    shared: int = 0  # bytes not duplicated on disk (reflinked or hardlinked)
+    seconds: float = 0.0
+
+
+def _scan_tree(src: str, dst: str, files: List[Tuple[str, str, int]]) -> None:
+    """Recreate the directory skeleton and symlinks of src under dst; collect regular files."""
+    os.mkdir(dst, os.stat(src).st_mode & 0o7777 | stat.S_IWUSR | stat.S_IXUSR)
+    with os.scandir(src) as it:
+        for entry in it:
+            s, d = entry.path, os.path.join(dst, entry.name)
+            if entry.is_symlink():
+                os.symlink(os.readlink(s), d)  # relative links (.bin/*) stay valid
+            elif entry.is_dir(follow_symlinks=False):
+                _scan_tree(s, d, files)
+            elif entry.is_file(follow_symlinks=False):
+                files.append((s, d, entry.stat(follow_symlinks=False).st_size))
+
+
+def provision_tree(src: Path, dst: Path, mode: str = "auto", jobs: int = 8) -> Tuple[str, ProvisionStats]:
+    """Populate dst from src with the cheapest method that works, in parallel.
+
+    `auto` tries reflink, then falls back to copy. Hardlinks are only used
+    when asked for: hardlinked files are shared with the main worktree, so
+    tools that rewrite files in place would affect both.
+    """
+    t0 = time.perf_counter()
+    files: List[Tuple[str, str, int]] = []
+    _scan_tree(str(src), str(dst), files)
+    stats = ProvisionStats(files=len(files), bytes=sum(f[2] for f in files))
+    order = ["reflink", "copy"] if mode == "auto" else [mode]
+    method = order[-1]
+    if files:
+        # probe on the first file; the rest of the tree lives on the same filesystems
+        for method in order:
+            if _PROVISION_FNS[method](files[0][0], files[0][1]):
+                break
+        else:
+            _copy(files[0][0], files[0][1])
+            method = "copy"
+        fn = _PROVISION_FNS[method]
+
+        def place(item: Tuple[str, str, int]) -> int:
+            """Bytes shared with src: 0 when the file had to be copied."""
+            if fn(item[0], item[1]) and fn is not _copy:
+                return item[2]
+            if not os.path.lexists(item[1]):
+                _copy(item[0], item[1])
+            return 0
+
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            stats.shared = sum(pool.map(place, files[1:], chunksize=64))
+        if method != "copy":
+            stats.shared += files[0][2]
+    stats.seconds = time.perf_counter() - t0
+    return method, stats
+
+
+def _human_bytes(n: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024 or unit == "GB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} TB"
+
+
+async def provision(dest: Path, *, quiet: bool = False) -> None:
+    """Clone heavy, untracked directories (wt.provision) from the main worktree into dest."""
+    mode = (config_get("wt.provisionMode") or "auto").lower()
+    if mode in ("off", "false", "no", "none"):
+        return
+    if mode not in PROVISION_MODES:
+        print(f"{C.YELLOW}unknown wt.provisionMode {mode!r}, using auto{C.RESET}", file=sys.stderr)
+        mode = "auto"
+    main = main_worktree()
+    if main.resolve() == dest.resolve():
+        return
+    for rel in config_list("wt.provision") or PROVISION_DEFAULT:
+        src, dst = main / rel, dest / rel
+        if not src.is_dir() or src.is_symlink() or dst.exists():
+            continue
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            method, st = await asyncio.to_thread(provision_tree, src, dst, mode, max_jobs())
+        except OSError as e:
+            print(f"{C.RED}provision {rel}: {e}{C.RESET}", file=sys.stderr)
+            shutil.rmtree(dst, ignore_errors=True)
+            continue
+        if quiet:
+            continue
+        saved = f", {_human_bytes(st.shared)} shared" if st.shared else ""
+        print(
+            f"{C.DIM}provisioned {rel}: {st.files} files, {_human_bytes(st.bytes)} "
+            f"via {method} in {st.seconds:.2f}s{saved}{C.RESET}",
+            file=sys.stderr,
+        )
+
+
+async def setup_worktree(path: Path, *, provision_deps: bool = True) -> None:
+    copy_env_files(path)
+    if provision_deps:
+        await provision(path)
+    print(path)
+
+# -----------------------------------------------------------------------------
+# warm worktree pool
+# -----------------------------------------------------------------------------
+#
+# Pool entries are detached, clean worktrees under <wt.root>/<repo>/.pool.
+# An entry is claimable once its <id>.ready marker exists; claiming deletes
+# the marker under an flock, so concurrent `gwt new` calls never share one.
+# Detached worktrees are invisible to the selector, prune and the daemon.
+
+POOL_MAX_AGE_HOURS = 72.0
+
+
+def pool_dir() -> Path:
+    return shared_base() / ".pool"
+
+
+def pool_size() -> int:
+    size = config_get("wt.pool.size")
+    return int(size) if size and size.isdigit() else 0
+
+
+def pool_max_age() -> float:
+    """Seconds after which an unclaimed entry is considered stale (wt.pool.maxAge, in hours)."""
+    try:
+        return float(config_get("wt.pool.maxAge") or POOL_MAX_AGE_HOURS) * 3600
+    except ValueError:
+        return POOL_MAX_AGE_HOURS * 3600
+
+
+@contextlib.contextmanager
+def _flock(path: Path, *, blocking: bool = True) -> Iterator[bool]:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a") as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _pool_entries(pool: Path) -> List[Tuple[Path, dict]]:
+    """Ready entries, oldest first."""
+    entries: List[Tuple[Path, dict]] = []
+    for marker in pool.glob("*.ready"):
+        try:
+            info = json.loads(marker.read_text())
+        except (OSError, ValueError):
+            continue
+        entries.append((pool / marker.stem, info))
+    return sorted(entries, key=lambda e: e[1].get("created", 0))
+
+
+async def _pool_add(pool: Path, commit: str, *, provision_deps: bool) -> Path:
+    entry = pool / f"{int(time.time())}-{os.getpid()}-{random.randrange(1 << 16):04x}"
+    await agit("worktree", "add", "--detach", str(entry), commit, timeout=None)
+    if provision_deps:
+        await provision(entry, quiet=True)
+    entry.with_suffix(".ready").write_text(json.dumps({"commit": commit, "created": time.time()}))
+    return entry
+
+
+async def _pool_discard(entry: Path) -> None:
+    entry.with_suffix(".ready").unlink(missing_ok=True)
+    await remove_worktree(entry, force=True)
+
+
+async def pool_claim() -> Path | None:
+    """Take the oldest fresh entry out of the pool, discarding stale or dirty ones."""
+    pool = pool_dir()
+    if not pool.is_dir():
+        return None
+    max_age = pool_max_age()
+    while True:
+        with _flock(pool / ".lock"):
+            entries = _pool_entries(pool)
+            if not entries:
+                return None
+            entry, info = entries[0]
+            entry.with_suffix(".ready").unlink(missing_ok=True)
+        if time.time() - info.get("created", 0) > max_age or not entry.is_dir():
+            await _pool_discard(entry)
+            continue
+        if await agit("status", "--porcelain", "--untracked-files=no", cwd=entry, check=False):
+            await _pool_discard(entry)
+            continue
+        return entry
+
+
+def pool_refill_in_background() -> None:
+    """Top the pool back up to wt.pool.size from a detached process."""
+    if pool_size() <= 0:
+        return
+    spawn_detached("pool", "fill")
+
+
+async def cmd_pool_fill(count: int | None) -> None:
+    target = count if count is not None else pool_size()
+    if target <= 0:
+        sys.exit("pool size is 0; pass a count or set wt.pool.size")
+    pool = pool_dir()
+    with _flock(pool / ".fill.lock", blocking=False) as locked:
+        if not locked:
+            print("pool fill already running", file=sys.stderr)
+            return
+        max_age = pool_max_age()
+        fresh = 0
+        for entry, info in _pool_entries(pool):
+            if time.time() - info.get("created", 0) > max_age:
+                with _flock(pool / ".lock"):
+                    claimed = entry.with_suffix(".ready").exists()
+                    entry.with_suffix(".ready").unlink(missing_ok=True)
+                if claimed:
+                    await _pool_discard(entry)
+            else:
+                fresh += 1
+        commit = await agit("rev-parse", "HEAD", cwd=main_worktree())
+        missing = max(0, target - fresh)
+        t0 = time.monotonic()
+        for _ in range(missing):
+            # one at a time: checkouts are I/O bound and each entry is claimable as soon as it lands
+            await _pool_add(pool, commit, provision_deps=True)
+        if missing:
+            print(f"{C.DIM}pool: added {missing} worktrees in {time.monotonic() - t0:.1f}s{C.RESET}", file=sys.stderr)
+        print(f"pool: {fresh + missing} ready")
+
+
+async def cmd_pool_clear() -> None:
+    pool = pool_dir()
+    with _flock(pool / ".lock"):
+        entries = _pool_entries(pool)
+        for entry, _ in entries:
+            entry.with_suffix(".ready").unlink(missing_ok=True)
+    await asyncio.gather(*(_pool_discard(e) for e, _ in entries))
+    print(f"pool: removed {len(entries)} worktrees")
+
+
+async def cmd_pool(args: List[str]) -> None:
+    action = args[0] if args else "status"
+    if action == "fill":
+        if len(args) > 1 and not args[1].isdigit():
+            sys.exit(f"bad count: {args[1]}")
+        await cmd_pool_fill(int(args[1]) if len(args) > 1 else None)
+    elif action == "clear":
+        await cmd_pool_clear()
+    elif action == "status":
+        max_age = pool_max_age()
+        entries = _pool_entries(pool_dir())
+        for entry, info in entries:
+            age = time.time() - info.get("created", 0)
+            state = f"{C.YELLOW}stale{C.RESET}" if age > max_age else f"{C.GREEN}ready{C.RESET}"
+            print(f"{state}  {info.get('commit', '?')[:12]}  {age / 3600:5.1f}h  {relpath(entry)}")
+        print(f"pool: {len(entries)} of {pool_size()} (wt.pool.size)", file=sys.stderr)
+    else:
+        sys.exit(f"unknown pool action: {action} (fill [N], clear, status)")
+
+
 # -----------------------------------------------------------------------------
 # subcommands
 # -----------------------------------------------------------------------------
 
-def cmd_new(branch: str) -> None:
+async def _new_from_pool(branch: str, path: Path, exists: bool) -> bool:
+    """Turn a pool entry into the worktree for `branch`. False if the pool can't serve it."""
+    entry = await pool_claim()
+    if entry is None:
+        return False
+    if exists:
+        switch = ["switch", "--quiet", branch]
+    else:
+        # same start point `git worktree add -b` would use: HEAD of the current worktree
+        switch = ["switch", "--quiet", "-c", branch, await agit("rev-parse", "HEAD")]
+    p = await run_cmd(["git", *switch], cwd=entry, timeout=None)
+    if p.returncode != 0:
+        sys.stderr.write(p.stderr)
+        await _pool_discard(entry)
+        return False
+    # `worktree move` won't create parents, which a branch like feat/x needs
+    with contextlib.suppress(OSError):
+        path.parent.mkdir(parents=True, exist_ok=True)
+    p = await run_cmd(["git", "worktree", "move", str(entry), str(path)], timeout=None)
+    if p.returncode != 0:
+        # Don't leave the branch checked out inside .pool; drop the entry and
+        # the branch we just made so `worktree add` can start over
+        sys.stderr.write(p.stderr)
+        await _pool_discard(entry)
+        if not exists:
+            await run_cmd(["git", "branch", "-D", branch], timeout=None)
+        return False
+    return True
+
+
+def sparse_profile() -> List[str]:
+    """Directories from wt.sparseProfile (multi-valued, or whitespace-separated)."""
+    return [d for value in config_list("wt.sparseProfile") for d in value.split()]
+
+
+def _checkout_usage(path: Path) -> Tuple[int, int]:
+    """(files, bytes) materialized in a worktree, not counting .git."""
+    files = size = 0
+    stack = [str(path)]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                if entry.name == ".git" and entry.path == str(path / ".git"):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                else:
+                    files += 1
+                    size += entry.stat(follow_symlinks=False).st_size
+    return files, size
+
+
+async def add_sparse_worktree(path: Path, branch: str, exists: bool, dirs: List[str]) -> None:
+    """`worktree add --no-checkout`, cone-mode sparse-checkout, then materialize only those dirs."""
+    t0 = time.monotonic()
+    if exists:
+        await agit("worktree", "add", "--no-checkout", str(path), branch, timeout=None)
+    else:
+        await agit("worktree", "add", "--no-checkout", "-b", branch, str(path), timeout=None)
+    # in a linked worktree this lands in config.worktree, leaving other worktrees full
+    await agit("sparse-checkout", "set", "--cone", *dirs, cwd=path, timeout=None)
+    await agit("read-tree", "-mu", "HEAD", cwd=path, timeout=None)
+    secs = time.monotonic() - t0
+
+    files, size = await asyncio.to_thread(_checkout_usage, path)
+    tree = await agit("ls-tree", "-r", "-l", "HEAD", cwd=path, check=False)
+    sizes = [line.split(None, 4)[3] for line in tree.splitlines()]
+    full_size = sum(int(s) for s in sizes if s.isdigit())
+    print(
+        f"{C.DIM}sparse checkout ({' '.join(dirs)}): {files}/{len(sizes)} files, "
+        f"{_human_bytes(size)}/{_human_bytes(full_size)} of a full checkout, in {secs:.2f}s{C.RESET}",
+        file=sys.stderr,
+    )
+
+
+async def cmd_new(branch: str, *, provision_deps: bool = True, sparse: List[str] | None = None) -> None:
+    """Create a worktree for branch; `sparse` (default: wt.sparseProfile, [] for full) limits the checkout."""
     base = worktree_base()
     path = base / branch
     if path.exists():
         sys.exit(f"path already exists: {path}")
     base.mkdir(parents=True, exist_ok=True)
+    dirs = sparse_profile() if sparse is None else sparse
+
+    exists = await ref_exists(f"refs/heads/{branch}")
+    if dirs:
+        # pool entries are full checkouts, so sparse worktrees are always built fresh
+        await add_sparse_worktree(path, branch, exists, dirs)
+    elif not await _new_from_pool(branch, path, exists):
+        if exists:
+            await agit("worktree", "add", str(path), branch, timeout=None)
+        else:
+            await agit("worktree", "add", "-b", branch, str(path), timeout=None)
 
-    if subprocess.call(
-        ["git", "show-ref", "--verify", f"refs/heads/{branch}"],
-        stdout=subprocess.DEVNULL,
-        stderr=subprocess.DEVNULL,
-    ) == 0:
-        git("worktree", "add", str(path), branch)
-    else:
-        git("worktree", "add", "-b", branch, str(path))
-
-    copy_env_files(path)
-    print(path)
+    await setup_worktree(path, provision_deps=provision_deps)
+    pool_refill_in_background()
 
 
-def cmd_checkout(ref: str) -> None:
+async def cmd_checkout(ref: str, *, provision_deps: bool = True) -> None:
     base = worktree_base()
     base.mkdir(parents=True, exist_ok=True)
 
+    full = await qualify_ref(ref)
+
     # Check if it's a local branch
-    if subprocess.call(
-        ["git", "show-ref", "--verify", f"refs/heads/{ref}"],
-        stdout=subprocess.DEVNULL,
-        stderr=subprocess.DEVNULL,
-    ) == 0:
+    if full == f"refs/heads/{ref}":
         path = base / ref
-        git("worktree", "add", str(path), ref)
-        copy_env_files(path)
-        print(path)
+        await agit("worktree", "add", str(path), ref, timeout=None)
+        await setup_worktree(path, provision_deps=provision_deps)
         return
 
     # Check if it's a remote branch
-    if subprocess.call(
-        ["git", "show-ref", "--verify", f"refs/remotes/{ref}"],
-        stdout=subprocess.DEVNULL,
-        stderr=subprocess.DEVNULL,
-    ) == 0:
+    if full == f"refs/remotes/{ref}":
         local = ref.split("/")[-1]
         path = base / local  # Use local branch name for path, not full remote ref
-        git("worktree", "add", "-b", local, str(path), ref)
-        copy_env_files(path)
-        print(path)
+        await agit("worktree", "add", "-b", local, str(path), ref, timeout=None)
+        await setup_worktree(path, provision_deps=provision_deps)
         return
 
     # Detached HEAD (commit hash, tag, etc.) - use short hash for path if it's a full hash
     path_name = ref[:12] if len(ref) == 40 and all(c in "0123456789abcdef" for c in ref.lower()) else ref
     path = base / path_name
-    git("worktree", "add", "--detach", str(path), ref)
-    copy_env_files(path)
-    print(path)
+    await agit("worktree", "add", "--detach", str(path), ref, timeout=None)
+    await setup_worktree(path, provision_deps=provision_deps)
+
+
+def cmd_complete(prefix: str) -> None:
+    """Names for shell completion; runs on every keystroke, so no git processes when avoidable."""
+    snap = ref_snapshot()
+    if snap is not None:
+        names = snap.complete(prefix)
+    else:
+        out = git("for-each-ref", "--format=%(refname:lstrip=2)", "refs/heads", "refs/remotes", "refs/tags", check=False)
+        names = [n for n in out.splitlines() if n.startswith(prefix) and not n.endswith("/HEAD")]
+    sys.stdout.write("".join(f"{n}\n" for n in names))
 
 
-def cmd_dev(worktree_name: str | None) -> None:
+async def cmd_dev(worktree_name: str | None, *, use_cache: bool = True) -> None:
     """Print worktree path for dev command (shell wrapper runs npm run dev)."""
     if worktree_name:
         path = worktree_for_branch(worktree_name)
         if path is None:
             sys.exit(f"no worktree found for branch: {worktree_name}")
     else:
-        result = select_worktree()
+        result = await select_worktree(use_cache=use_cache)
         if result is None:
             return
         path = result[0]
@@ -237,43 +1090,228 @@ def cmd_dev(worktree_name: str | None) -> None:
     print(path)
 
 
-def cmd_prune(force: bool) -> None:
-    prunable: List[Path] = []
+REMOVE_RETRIES = 6
 
-    for path, _ in worktrees():
-        # Skip stale worktrees (path no longer exists on disk)
-        if not path.exists():
-            continue
 
-        # Skip main worktree (has .git directory, not file)
-        git_path = path / ".git"
-        if git_path.is_dir():
-            continue
+def _progress(label: str, done: int, total: int) -> None:
+    if sys.stderr.isatty():
+        sys.stderr.write(f"\r{C.DIM}{label} {done}/{total}{C.RESET}\033[K")
+        sys.stderr.flush()
 
-        if git("status", "--porcelain", cwd=path):
-            continue
 
-        if subprocess.call(
-            ["git", "rev-parse", "@{u}"],
-            cwd=path,
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-        ) != 0:
-            continue
+def _end_progress() -> None:
+    if sys.stderr.isatty():
+        sys.stderr.write("\r\033[K")
+        sys.stderr.flush()
 
-        counts = git("rev-list", "--left-right", "--count", "HEAD...@{u}", cwd=path)
-        if counts not in ("0\t0", "0 0"):
-            continue
 
-        prunable.append(path)
+async def remove_worktree(path: Path, *, force: bool = False, cwd: Path | None = None) -> str | None:
+    """Run `git worktree remove`, retrying while another removal holds a lock.
+
+    Concurrent removals race on lock files under .git (worktree admin dirs,
+    config.lock); those failures are retried with jittered backoff. Returns
+    None on success, otherwise git's error message.
+    """
+    cmd = ["git", "worktree", "remove", *(["--force"] if force else []), str(path)]
+    delay = 0.05
+    for attempt in range(REMOVE_RETRIES):
+        p = await run_cmd(cmd, cwd=cwd, timeout=None)
+        if p.returncode == 0:
+            return None
+        if ".lock" not in p.stderr or attempt == REMOVE_RETRIES - 1:
+            return p.stderr.strip()
+        await asyncio.sleep(delay * random.uniform(1, 2))
+        delay *= 2
+    return None
+
+
+# Removal is split in two: the worktree directory is renamed into
+# <wt.root>/<repo>/.trash and its admin dir under .git/worktrees deleted, which
+# is all git needs to forget it; a detached `reap` process then deletes the
+# files. Reaping is idempotent, so an interrupted reaper just leaves work for
+# the next one.
+
+def trash_dir() -> Path:
+    return shared_base() / ".trash"
+
+
+def _trash_enabled() -> bool:
+    return (config_get("wt.trash") or "true").lower() not in ("false", "no", "off", "0")
+
+
+def trash_worktree(path: Path) -> bool:
+    """Detach `path` from git and move it to the trash. False if it has to go through git instead.
+
+    Callers check cleanliness first; like `git worktree remove`, locked
+    worktrees and worktrees with submodules are left to git.
+    """
+    gitfile = _read_text(path / ".git")
+    if not gitfile or not gitfile.startswith("gitdir: "):
+        return False
+    admin = (path / gitfile.removeprefix("gitdir: ")).resolve()
+    if admin.parent.name != "worktrees" or (admin / "locked").exists() or (admin / "modules").exists():
+        return False
+    trash = trash_dir()
+    if trash.resolve().is_relative_to(path.resolve()):
+        return False  # can't move a directory into itself
+    trash.mkdir(parents=True, exist_ok=True)
+    dest = trash / f"{path.name}-{int(time.time())}-{os.getpid()}"
+    try:
+        os.rename(path, dest)
+    except OSError as e:
+        if e.errno in (errno.EXDEV, errno.EBUSY, errno.EACCES, errno.EPERM, errno.EINVAL):
+            return False  # another filesystem, in use, or inside dest: let git delete it in place
+        raise
+    shutil.rmtree(admin, ignore_errors=True)
+    return True
+
+
+async def discard_worktree(path: Path, *, force: bool = False, cwd: Path | None = None) -> str | None:
+    """Remove a worktree via the trash when possible, else `git worktree remove`."""
+    if _trash_enabled() and trash_worktree(path):
+        return None
+    return await remove_worktree(path, force=force, cwd=cwd)
+
+
+def _unlink(path: str) -> None:
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+    except PermissionError:
+        os.chmod(os.path.dirname(path), 0o700)
+        os.unlink(path)
+
+
+def _clear_dir(path: str) -> List[str]:
+    """Delete the non-directories in path; return its subdirectories."""
+    subdirs: List[str] = []
+    try:
+        it = os.scandir(path)
+    except PermissionError:
+        os.chmod(path, 0o700)
+        it = os.scandir(path)
+    except FileNotFoundError:
+        return subdirs
+    with it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.path)
+            else:
+                _unlink(entry.path)
+    return subdirs
+
+
+def reap_tree(root: str, jobs: int) -> int:
+    """Delete a directory tree, scanning directories in parallel. Returns the directory count."""
+    dirs = [root]
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        pending: set[Future[List[str]]] = {pool.submit(_clear_dir, root)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                for sub in fut.result():
+                    dirs.append(sub)
+                    pending.add(pool.submit(_clear_dir, sub))
+    for d in sorted(dirs, key=lambda d: d.count(os.sep), reverse=True):
+        with contextlib.suppress(FileNotFoundError):
+            os.rmdir(d)
+    return len(dirs)
+
+
+async def cmd_reap() -> None:
+    trash = trash_dir()
+    if not trash.is_dir():
+        return
+    with _flock(trash / ".reap.lock", blocking=False) as locked:
+        if not locked:
+            print("reaper already running", file=sys.stderr)
+            return
+        t0 = time.monotonic()
+        reaped = 0
+        while True:  # pick up anything trashed while we were busy
+            victims = [e.path for e in os.scandir(trash) if e.is_dir(follow_symlinks=False)]
+            if not victims:
+                break
+            for v in victims:
+                print(f"{C.DIM}deleting {relpath(Path(v))}{C.RESET}", file=sys.stderr)
+                await asyncio.to_thread(reap_tree, v, max_jobs())
+                reaped += 1
+        print(f"reaped {reaped} worktrees in {time.monotonic() - t0:.1f}s", file=sys.stderr)
+
+
+async def prunable_worktrees() -> List[Tuple[Path, str]]:
+    """Clean linked worktrees whose branch is at its upstream or merged into the base.
+
+    Returns (path, reason) pairs in `git worktree list` order. Merged means
+    reachable from default_base() or squash-merged into it, and only counts
+    for a branch that moved since it was created (see has_own_commits) or
+    whose upstream is gone; a fresh `gwt new` branch is never merged.
+    """
+    # Skip stale worktrees (path no longer exists on disk) and the main
+    # worktree (has .git directory, not file)
+    items = [(p, b) for p, b in worktrees() if p.exists() and not (p / ".git").is_dir()]
+    if not items:
+        return []
+    base = default_base()
+    table_task = asyncio.ensure_future(branch_table(merged_into=base, squash=[b for _, b in items]))
+    base_task = asyncio.ensure_future(agit("rev-parse", "--verify", "--quiet", f"{base}^{{commit}}", check=False))
+
+    clean: Dict[Path, Snapshot] = {}
+    done = 0
+    async for snap in iter_snapshots(items):
+        done += 1
+        _progress("checking", done, len(items))
+        if not snap.dirty and not snap.failed:
+            clean[snap.path] = snap
+    _end_progress()
+    table, base_oid = await asyncio.gather(table_task, base_task)
+
+    eligible: List[Tuple[Path, str]] = []
+    for path, branch in items:
+        snap, st = clean.get(path), table.get(branch)
+        if snap is None:
+            continue
+        if snap.has_upstream and snap.synced:
+            eligible.append((path, "synced"))
+        elif (
+            st is not None
+            and st.oid == snap.oid
+            and (st.merged or st.squashed)
+            and st.oid != base_oid
+            and (st.gone or has_own_commits(branch, st.oid))
+        ):
+            eligible.append((path, "merged" if st.merged else "squash-merged"))
+    return eligible
+
+
+def has_own_commits(branch: str, oid: str) -> bool:
+    """Whether the branch has moved since it was created (per its reflog).
+
+    Without a reflog there's no telling, so the branch is assumed to have
+    work of its own; prunable_worktrees still rejects one at the base tip.
+    """
+    created = branch_created_at(branch)
+    return created is None or created != oid
+
+
+async def cmd_prune(force: bool, dry_run: bool = False) -> None:
+    t0 = time.monotonic()
+    prunable = await prunable_worktrees()
+    check_secs = time.monotonic() - t0
 
     if not prunable:
         print("No prunable worktrees found.")
         return
 
-    print("The following worktrees are fully synced and will be removed:", file=sys.stderr)
-    for p in prunable:
-        print(f"  {p}", file=sys.stderr)
+    verb = "would be" if dry_run else "will be"
+    print(f"The following worktrees are fully synced or merged and {verb} removed:", file=sys.stderr)
+    for p, reason in prunable:
+        print(f"  {p} {C.DIM}({reason}){C.RESET}", file=sys.stderr)
+
+    if dry_run:
+        print(f"{C.DIM}(checked in {check_secs:.1f}s){C.RESET}", file=sys.stderr)
+        return
 
     if not force:
         try:
@@ -286,153 +1324,1413 @@ def cmd_prune(force: bool) -> None:
             print(file=sys.stderr)
             return
 
-    for p in prunable:
-        git("worktree", "remove", str(p))
+    t1 = time.monotonic()
+    failed: Dict[Path, str] = {}
+    done = 0
+
+    async def remove(p: Path) -> None:
+        nonlocal done
+        err = await discard_worktree(p)
+        if err is not None:
+            failed[p] = err
+        done += 1
+        _progress("removing", done, len(prunable))
+
+    await asyncio.gather(*(remove(p) for p, _ in prunable))
+    _end_progress()
+    remove_secs = time.monotonic() - t1
+
+    for p, err in failed.items():
+        print(f"{C.RED}failed to remove {p}: {err}{C.RESET}", file=sys.stderr)
+    removed = len(prunable) - len(failed)
+    print(
+        f"Removed {removed}/{len(prunable)} worktrees in {check_secs + remove_secs:.1f}s "
+        f"{C.DIM}(check {check_secs:.1f}s, remove {remove_secs:.1f}s){C.RESET}",
+        file=sys.stderr,
+    )
+    if trash_dir().is_dir():
+        spawn_detached("reap")
+    if failed:
+        sys.exit(1)
+
 
-def _status_and_time(path: Path) -> Tuple[bool, str]:
-    dirty = bool(git("status", "--porcelain", cwd=path))
-    raw_time = git("log", "-1", "--pretty=%cr", cwd=path, check=False)
-    return dirty, raw_time
+# -----------------------------------------------------------------------------
+# disk usage
+# -----------------------------------------------------------------------------
+#
+# Per-directory results are cached in $GIT_COMMON_DIR/wt-du-cache.json keyed by
+# the directory's mtime, so repeat runs only rescan directories whose entries
+# changed. A file that grows in place without being renamed keeps a stale size
+# until its directory changes; package managers and build tools write by
+# rename, so in practice this tracks node_modules and build output well.
+#
+# The totals of the last measurement go to wt-size-cache.json, which is all the
+# worktree list reads (wt.showSize); measuring happens in the background.
+
+DU_CACHE_FILE = "wt-du-cache.json"
+DU_CACHE_VERSION = 1
+SIZE_CACHE_FILE = "wt-size-cache.json"
+SIZE_TTL = 60.0  # seconds before the list asks for a new measurement
+
+DirUsage = Tuple[int, int, List[List[int]], List[str]]  # mtime_ns, bytes, [[dev, ino, bytes]], subdirs
+
+
+def _scan_usage(path: str, mtime: int) -> DirUsage:
+    size = 0
+    links: List[List[int]] = []
+    subdirs: List[str] = []
+    with os.scandir(path) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.name)
+                continue
+            st = entry.stat(follow_symlinks=False)
+            if st.st_nlink > 1:
+                links.append([st.st_dev, st.st_ino, st.st_blocks * 512])
+            else:
+                size += st.st_blocks * 512
+    return mtime, size, links, subdirs
+
+
+class DiskUsage:
+    """Allocated bytes per tree, hardlinks counted once, from a parallel os.scandir walk."""
+
+    def __init__(self, cache: Dict[str, DirUsage]) -> None:
+        self.cache = cache
+        self.seen: Dict[str, DirUsage] = {}
+        self.rescanned = 0
+
+    def _dir(self, path: str) -> Tuple[int, DirUsage] | None:
+        try:
+            st = os.stat(path, follow_symlinks=False)
+        except OSError:
+            return None
+        cached = self.cache.get(path)
+        if cached is not None and cached[0] == st.st_mtime_ns:
+            usage = cached
+        else:
+            try:
+                usage = _scan_usage(path, st.st_mtime_ns)
+            except OSError:
+                return None
+            self.rescanned += 1
+        self.seen[path] = usage
+        return st.st_blocks * 512, usage
+
+    def measure(self, roots: List[Path], jobs: int) -> List[int]:
+        """Size of each root, in order. Inodes shared between roots count toward the first."""
+        skip = {str(r) for r in roots}
+        own = [0] * len(roots)
+        linked: List[Dict[Tuple[int, int], int]] = [{} for _ in roots]
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            pending: Dict[Future[Tuple[int, DirUsage] | None], Tuple[int, str]] = {
+                pool.submit(self._dir, str(r)): (i, str(r)) for i, r in enumerate(roots)
+            }
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    i, path = pending.pop(fut)
+                    result = fut.result()
+                    if result is None:
+                        continue
+                    dir_bytes, (_, size, links, subdirs) = result
+                    own[i] += dir_bytes + size
+                    for dev, ino, b in links:
+                        linked[i][(dev, ino)] = b
+                    for name in subdirs:
+                        sub = os.path.join(path, name)
+                        if sub not in skip:  # nested worktrees, pool and trash are measured separately
+                            pending[pool.submit(self._dir, sub)] = (i, sub)
+        counted: set[Tuple[int, int]] = set()
+        sizes = []
+        for i in range(len(roots)):
+            fresh = {k: b for k, b in linked[i].items() if k not in counted}
+            counted.update(fresh)
+            sizes.append(own[i] + sum(fresh.values()))
+        return sizes
+
+
+def worktree_sizes(roots: List[Path], *, use_cache: bool = True) -> List[int]:
+    cache_path = git_common_dir() / DU_CACHE_FILE
+    cache: Dict[str, DirUsage] = {}
+    if use_cache:
+        try:
+            with open(cache_path) as f:
+                data = json.load(f)
+            if data.get("version") == DU_CACHE_VERSION:
+                cache = {k: tuple(v) for k, v in data["dirs"].items()}  # type: ignore[misc]
+        except (OSError, ValueError, KeyError):
+            pass
+    du = DiskUsage(cache)
+    sizes = du.measure(roots, max_jobs())
+    if use_cache and du.rescanned:
+        tmp = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp, "w") as f:
+                json.dump({"version": DU_CACHE_VERSION, "dirs": du.seen}, f)
+            os.replace(tmp, cache_path)
+        except OSError:
+            tmp.unlink(missing_ok=True)
+    _save_sizes({str(r): n for r, n in zip(roots, sizes)})
+    return sizes
+
+
+def _save_sizes(sizes: Dict[str, int]) -> None:
+    path = git_common_dir() / SIZE_CACHE_FILE
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp, "w") as f:
+            json.dump(sizes, f)
+        os.replace(tmp, path)
+    except OSError:
+        tmp.unlink(missing_ok=True)
+
+
+def cached_sizes() -> Tuple[Dict[Path, int], float]:
+    """Totals from the last measurement and its age in seconds (inf if there is none)."""
+    path = git_common_dir() / SIZE_CACHE_FILE
+    try:
+        age = time.time() - path.stat().st_mtime
+        with open(path) as f:
+            return {Path(k): v for k, v in json.load(f).items()}, age
+    except (OSError, ValueError, AttributeError):
+        return {}, float("inf")
+
+
+async def cmd_du(sort: str = "size", *, use_cache: bool = True) -> None:
+    items: List[Tuple[Path, str]] = list_items()
+    items += [(d, f"({d.name[1:]})") for d in (pool_dir(), trash_dir()) if d.is_dir()]
+    t0 = time.monotonic()
+    sizes = await asyncio.to_thread(worktree_sizes, [p for p, _ in items], use_cache=use_cache)
+    rows = list(zip(sizes, items))
+    if sort == "size":
+        rows.sort(key=lambda r: -r[0])
+    elif sort == "name":
+        rows.sort(key=lambda r: r[1][1])
+    for size, (path, branch) in rows:
+        print(f"{_human_bytes(size):>9}  {truncate_right(branch, 35)}{C.DIM}{relpath(path)}{C.RESET}")
+    print(
+        f"{C.DIM}{_human_bytes(sum(sizes))} in {len(items)} trees, {time.monotonic() - t0:.2f}s "
+        f"(hardlinked files counted once){C.RESET}",
+        file=sys.stderr,
+    )
 
 
-def _has_upstream(path: Path) -> bool:
-    return (
-        subprocess.call(
-            ["git", "rev-parse", "@{u}"],
-            cwd=path,
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-        )
-        == 0
+# -----------------------------------------------------------------------------
+# status cache
+# -----------------------------------------------------------------------------
+
+CACHE_FILE = "wt-status-cache.json"
+CACHE_VERSION = 3
+CACHE_TTL = 60.0  # seconds; bounds staleness from unstaged edits the index does not see
+
+CACHE_STATS = {"hit": 0, "miss": 0}
+
+
+def _packed_refs(common: Path) -> Dict[str, str]:
+    refs: Dict[str, str] = {}
+    try:
+        with open(common / "packed-refs") as f:
+            for line in f:
+                if line.startswith(("#", "^")):
+                    continue
+                parts = line.split()
+                if len(parts) == 2:
+                    refs[parts[1]] = parts[0]
+    except OSError:
+        pass
+    return refs
+
+
+def _resolve_ref(common: Path, ref: str, packed: Dict[str, str]) -> str | None:
+    return _read_text(common / ref) or packed.get(ref)
+
+
+def _upstream_refs() -> Dict[str, str]:
+    """Map local branch name -> upstream ref, from the branch.* config."""
+    cfg = _config()
+    if cfg is None:
+        out = git("config", "--get-regexp", r"^branch\..*\.(remote|merge)$", check=False)
+        pairs = [(line.partition(" ")[0], line.partition(" ")[2]) for line in out.splitlines()]
+    else:
+        pairs = [(k, v[-1]) for k, v in cfg.items() if k.startswith("branch.")]
+    remotes: Dict[str, str] = {}
+    merges: Dict[str, str] = {}
+    for key, value in pairs:
+        name, _, field = key.removeprefix("branch.").rpartition(".")
+        if field == "remote":
+            remotes[name] = value
+        elif field == "merge":
+            merges[name] = value
+    upstreams: Dict[str, str] = {}
+    for name, merge in merges.items():
+        remote = remotes.get(name)
+        if remote is None:
+            continue
+        if remote == ".":
+            upstreams[name] = merge
+        else:
+            upstreams[name] = f"refs/remotes/{remote}/{merge.removeprefix('refs/heads/')}"
+    return upstreams
+
+
+def _fingerprint(
+    path: Path,
+    branch: str,
+    common: Path,
+    packed: Dict[str, str],
+    upstreams: Dict[str, str],
+) -> List[object] | None:
+    """Cheap, stat-only key that changes whenever the row data may have changed."""
+    gitdir = _worktree_git_dir(path)
+    if gitdir is None:
+        return None
+    head = _read_text(gitdir / "HEAD")
+    if head is None:
+        return None
+    oid = _resolve_ref(common, head[5:].strip(), packed) if head.startswith("ref:") else head
+    try:
+        st = os.stat(gitdir / "index")
+        index = [st.st_mtime_ns, st.st_size]
+    except OSError:
+        index = None
+    up_ref = upstreams.get(branch)
+    up_oid = _resolve_ref(common, up_ref, packed) if up_ref else None
+    return [head, oid, index, up_ref, up_oid]
+
+
+def _load_cache(cache_path: Path) -> Dict[str, dict]:
+    try:
+        with open(cache_path) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if data.get("version") != CACHE_VERSION:
+        return {}
+    return data.get("entries", {})
+
+
+def _save_cache(cache_path: Path, entries: Dict[str, dict]) -> None:
+    tmp = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp, "w") as f:
+            json.dump({"version": CACHE_VERSION, "entries": entries}, f)
+        os.replace(tmp, cache_path)
+    except OSError:
+        tmp.unlink(missing_ok=True)
+
+
+def _cache_valid(entry: dict | None, fp: List[object] | None) -> bool:
+    if entry is None or fp is None or entry.get("fp") != fp:
+        return False
+    return time.time() - entry.get("at", 0) <= CACHE_TTL
+
+
+# -----------------------------------------------------------------------------
+# ref snapshot
+# -----------------------------------------------------------------------------
+#
+# Every branch, remote branch and tag, read from packed-refs and the loose
+# files under refs/ and cached in $GIT_COMMON_DIR/wt-refs-cache.json. The
+# cache is keyed by packed-refs' stat and the mtime of every directory under
+# refs/: git writes loose refs by renaming a lock file into place, so any
+# create, update or delete bumps the containing directory.
+
+REFS_CACHE_FILE = "wt-refs-cache.json"
+REFS_CACHE_VERSION = 1
+REF_NAMESPACES = ("refs/heads/", "refs/remotes/", "refs/tags/")
+_OID_RE = re.compile(r"^[0-9a-f]{40}(?:[0-9a-f]{24})?$")
+
+
+class RefSnapshot:
+    def __init__(self, refs: Dict[str, str]) -> None:
+        self.refs = refs
+        # short names per namespace, sorted for prefix search
+        self._names = {
+            ns: sorted(r[len(ns):] for r in refs if r.startswith(ns) and not r.endswith("/HEAD"))
+            for ns in REF_NAMESPACES
+        }
+
+    def qualify(self, name: str) -> str | None:
+        return next((f"{ns}{name}" for ns in REF_NAMESPACES if f"{ns}{name}" in self.refs), None)
+
+    def complete(self, prefix: str) -> List[str]:
+        """Short names starting with prefix: branches, then remote branches, then tags."""
+        out: List[str] = []
+        seen: set[str] = set()
+        for ns in REF_NAMESPACES:
+            names = self._names[ns]
+            i = bisect.bisect_left(names, prefix)
+            while i < len(names) and names[i].startswith(prefix):
+                if names[i] not in seen:
+                    seen.add(names[i])
+                    out.append(names[i])
+                i += 1
+        return out
+
+
+def _scan_refs(common: Path, rel: str, dirs: Dict[str, int], files: List[str]) -> None:
+    try:
+        it = os.scandir(common / rel)
+    except OSError:
+        return
+    with it:
+        dirs[rel] = os.stat(common / rel).st_mtime_ns
+        for entry in it:
+            name = f"{rel}/{entry.name}"
+            if entry.is_dir(follow_symlinks=False):
+                _scan_refs(common, name, dirs, files)
+            elif not entry.name.endswith(".lock"):
+                files.append(name)
+
+
+def _read_refs(common: Path, files: List[str]) -> Dict[str, str]:
+    refs = _packed_refs(common)
+    for name in files:
+        oid = _read_text(common / name)
+        if oid and _OID_RE.match(oid):  # symbolic refs (origin/HEAD) are skipped
+            refs[name] = oid  # loose refs shadow packed ones
+    return refs
+
+
+@functools.lru_cache(maxsize=None)
+def ref_snapshot() -> RefSnapshot | None:
+    """The repository's refs, or None for layouts this reader doesn't handle (reftable)."""
+    common = git_common_dir()
+    if (common / "reftable").exists():
+        return None
+    try:
+        st = os.stat(common / "packed-refs")
+        packed: List[int] = [st.st_mtime_ns, st.st_size]
+    except FileNotFoundError:
+        packed = []
+    dirs: Dict[str, int] = {}
+    files: List[str] = []
+    _scan_refs(common, "refs", dirs, files)
+    fp = {"packed": packed, "dirs": dirs}
+
+    cache_path = common / REFS_CACHE_FILE
+    try:
+        with open(cache_path) as f:
+            data = json.load(f)
+        if data.get("version") == REFS_CACHE_VERSION and data.get("fp") == fp:
+            return RefSnapshot(data["refs"])
+    except (OSError, ValueError, KeyError):
+        pass
+
+    refs = _read_refs(common, files)
+    tmp = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp, "w") as f:
+            json.dump({"version": REFS_CACHE_VERSION, "fp": fp, "refs": refs}, f)
+        os.replace(tmp, cache_path)
+    except OSError:
+        tmp.unlink(missing_ok=True)
+    return RefSnapshot(refs)
+
+
+# -----------------------------------------------------------------------------
+# index reader (fork-free tracked-changes check)
+# -----------------------------------------------------------------------------
+
+_INDEX_ENTRY = struct.Struct(">10I")
+_S_IFMT = 0o170000
+_S_IFGITLINK = 0o160000
+_OBJ_COMMIT = 1
+_OBJ_OFS_DELTA = 6
+_OBJ_REF_DELTA = 7
+
+
+@dataclass
+class IndexEntry:
+    name: str
+    mode: int
+    mtime: int
+    mtime_ns: int
+    ino: int
+    size: int
+    oid: bytes
+
+
+def _varint(data: bytes, pos: int) -> Tuple[int, int]:
+    """Decode git's offset varint (used by index v4 path compression)."""
+    b = data[pos]
+    pos += 1
+    val = b & 0x7F
+    while b & 0x80:
+        b = data[pos]
+        pos += 1
+        val = ((val + 1) << 7) | (b & 0x7F)
+    return val, pos
+
+
+def read_index(index_path: Path, hash_len: int = 20) -> Tuple[List[IndexEntry], bytes | None] | None:
+    """Parse a DIRC index (v2-v4).
+
+    Returns (entries, cache-tree root oid) or None if the index uses something
+    this reader can't vouch for: unmerged stages, intent-to-add entries,
+    gitlinks or a split index. Skip-worktree and assume-unchanged entries are
+    left out since git doesn't stat them either.
+    """
+    try:
+        data = index_path.read_bytes()
+    except OSError:
+        return None
+    if len(data) < 12 or data[:4] != b"DIRC":
+        return None
+    version, count = struct.unpack_from(">II", data, 4)
+    if version not in (2, 3, 4):
+        return None
+
+    entries: List[IndexEntry] = []
+    pos = 12
+    prev = b""
+    for _ in range(count):
+        start = pos
+        _ctime, _ctime_ns, mtime, mtime_ns, _dev, ino, mode, _uid, _gid, size = _INDEX_ENTRY.unpack_from(data, pos)
+        pos += _INDEX_ENTRY.size
+        oid = data[pos : pos + hash_len]
+        pos += hash_len
+        (flags,) = struct.unpack_from(">H", data, pos)
+        pos += 2
+        ext_flags = 0
+        if flags & 0x4000:
+            (ext_flags,) = struct.unpack_from(">H", data, pos)
+            pos += 2
+        if version == 4:
+            strip, pos = _varint(data, pos)
+            end = data.index(b"\0", pos)
+            name = prev[: len(prev) - strip] + data[pos:end]
+            pos = end + 1
+        else:
+            end = data.index(b"\0", pos)
+            name = data[pos:end]
+            pos = start + ((end - start + 8) & ~7)  # 1-8 NULs pad to a multiple of 8
+        prev = name
+
+        if flags & 0x3000 or ext_flags & 0x2000 or mode & _S_IFMT == _S_IFGITLINK:
+            return None  # unmerged, intent-to-add or submodule
+        if flags & 0x8000 or ext_flags & 0x4000:
+            continue  # assume-unchanged or skip-worktree
+        entries.append(IndexEntry(name.decode("utf-8", "surrogateescape"), mode, mtime, mtime_ns, ino, size, oid))
+
+    root_tree: bytes | None = None
+    end_of_ext = len(data) - hash_len
+    while pos + 8 <= end_of_ext:
+        sig = data[pos : pos + 4]
+        (size,) = struct.unpack_from(">I", data, pos + 4)
+        body = data[pos + 8 : pos + 8 + size]
+        pos += 8 + size
+        if sig == b"link":
+            return None
+        if sig == b"TREE":
+            # root entry: "" NUL "<entry_count> <subtrees>" LF [oid]
+            nul = body.index(b"\0")
+            lf = body.index(b"\n", nul)
+            if body[:nul] == b"" and not body[nul + 1 : lf].startswith(b"-"):
+                root_tree = body[lf + 1 : lf + 1 + hash_len]
+    return entries, root_tree
+
+
+def index_features(index_path: Path, hash_len: int = 20) -> Tuple[int, List[str]] | None:
+    """(version, extension signatures) of an index, for `maintain` to verify its settings."""
+    try:
+        data = index_path.read_bytes()
+    except OSError:
+        return None
+    if len(data) < 12 or data[:4] != b"DIRC":
+        return None
+    version, count = struct.unpack_from(">II", data, 4)
+    pos = 12
+    for _ in range(count):
+        start = pos
+        pos += _INDEX_ENTRY.size + hash_len
+        (flags,) = struct.unpack_from(">H", data, pos)
+        pos += 4 if flags & 0x4000 else 2
+        if version == 4:
+            _, pos = _varint(data, pos)
+            pos = data.index(b"\0", pos) + 1
+        else:
+            end = data.index(b"\0", pos)
+            pos = start + ((end - start + 8) & ~7)
+    sigs: List[str] = []
+    while pos + 8 <= len(data) - hash_len:
+        (size,) = struct.unpack_from(">I", data, pos + 4)
+        sigs.append(data[pos : pos + 4].decode("ascii", "replace"))
+        pos += 8 + size
+    return version, sigs
+
+
+def _parse_commit_tree(raw: bytes) -> bytes | None:
+    if not raw.startswith(b"tree "):
+        return None
+    return bytes.fromhex(raw[5 : raw.index(b"\n")].decode())
+
+
+def _loose_commit_tree(common: Path, oid: str) -> bytes | None:
+    try:
+        compressed = (common / "objects" / oid[:2] / oid[2:]).read_bytes()
+    except OSError:
+        return None
+    raw = zlib.decompressobj().decompress(compressed, 512)
+    header, _, body = raw.partition(b"\0")
+    return _parse_commit_tree(body) if header.startswith(b"commit ") else None
+
+
+def _inflate(f: IO[bytes]) -> bytes:
+    d = zlib.decompressobj()
+    out = b""
+    while not d.eof:
+        chunk = f.read(4096)
+        if not chunk:
+            break
+        out += d.decompress(chunk)
+    return out
+
+
+def _le_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    val = shift = 0
+    while True:
+        b = data[pos]
+        pos += 1
+        val |= (b & 0x7F) << shift
+        shift += 7
+        if not b & 0x80:
+            return val, pos
+
+
+def _apply_delta(base: bytes, delta: bytes) -> bytes:
+    _, pos = _le_varint(delta, 0)  # source size
+    _, pos = _le_varint(delta, pos)  # result size
+    out = bytearray()
+    while pos < len(delta):
+        op = delta[pos]
+        pos += 1
+        if op & 0x80:
+            offset = size = 0
+            for i in range(4):
+                if op & (1 << i):
+                    offset |= delta[pos] << (8 * i)
+                    pos += 1
+            for i in range(3):
+                if op & (0x10 << i):
+                    size |= delta[pos] << (8 * i)
+                    pos += 1
+            out += base[offset : offset + (size or 0x10000)]
+        else:
+            out += delta[pos : pos + op]
+            pos += op
+    return bytes(out)
+
+
+class _Pack:
+    """Read-only access to one pack via its v2 .idx, enough to fetch small objects."""
+
+    def __init__(self, idx_path: str) -> None:
+        # Mapped, not read: monorepo indexes run to hundreds of MB and a
+        # lookup only touches the fanout and a few pages of names
+        with open(idx_path, "rb") as f:
+            self.idx: bytes | mmap.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.pack_path = idx_path[:-4] + ".pack"
+        self.valid = self.idx[:4] == b"\xfftOc" and struct.unpack_from(">I", self.idx, 4)[0] == 2
+        self.fanout = struct.unpack_from(">256I", self.idx, 8) if self.valid else ()
+
+    def find(self, want: bytes) -> int | None:
+        if not self.valid:
+            return None
+        hash_len = len(want)
+        fanout = self.fanout
+        total = fanout[255]
+        lo = fanout[want[0] - 1] if want[0] else 0
+        hi = fanout[want[0]]
+        names = 8 + 256 * 4
+        while lo < hi:
+            mid = (lo + hi) // 2
+            cur = self.idx[names + mid * hash_len : names + (mid + 1) * hash_len]
+            if cur < want:
+                lo = mid + 1
+            elif cur > want:
+                hi = mid
+            else:
+                offsets = names + total * hash_len + total * 4
+                (offset,) = struct.unpack_from(">I", self.idx, offsets + mid * 4)
+                if offset & 0x80000000:
+                    large = offsets + total * 4 + (offset & 0x7FFFFFFF) * 8
+                    (offset,) = struct.unpack_from(">Q", self.idx, large)
+                return offset
+        return None
+
+    def read(self, offset: int, depth: int = 0) -> Tuple[int, bytes] | None:
+        """(type, content) at `offset`, resolving deltas within this pack."""
+        if depth > 64:
+            return None
+        with open(self.pack_path, "rb") as f:
+            f.seek(offset)
+            head = f.read(64)
+            c = head[0]
+            kind = (c >> 4) & 7
+            pos = 1
+            while c & 0x80:
+                c = head[pos]
+                pos += 1
+            if kind == _OBJ_OFS_DELTA:
+                rel, pos = _varint(head, pos)
+                base = self.read(offset - rel, depth + 1)
+            elif kind == _OBJ_REF_DELTA:
+                base_offset = self.find(head[pos : pos + 20])
+                pos += 20
+                base = None if base_offset is None else self.read(base_offset, depth + 1)
+            else:
+                f.seek(offset + pos)
+                return kind, _inflate(f)
+            f.seek(offset + pos)
+            delta = _inflate(f)
+        if base is None:
+            return None
+        return base[0], _apply_delta(base[1], delta)
+
+
+@functools.lru_cache(maxsize=64)
+def _open_pack(idx_path: str, mtime_ns: int, size: int) -> _Pack | None:
+    """One _Pack per index file; mtime and size in the key notice a repack (the daemon lives long)."""
+    try:
+        return _Pack(idx_path)
+    except (OSError, ValueError):  # unreadable, or empty (mmap can't map zero bytes)
+        return None
+
+
+def _packed_commit_tree(common: Path, oid: str) -> bytes | None:
+    want = bytes.fromhex(oid)
+    try:
+        idx_files = [
+            (e.path, e.stat()) for e in os.scandir(common / "objects" / "pack") if e.name.endswith(".idx")
+        ]
+    except OSError:
+        return None
+    for idx_path, st in idx_files:
+        pack = _open_pack(idx_path, st.st_mtime_ns, st.st_size)
+        if pack is None:
+            continue
+        offset = pack.find(want)
+        if offset is None:
+            continue
+        obj = pack.read(offset)
+        if obj is None or obj[0] != _OBJ_COMMIT:
+            return None
+        return _parse_commit_tree(obj[1])
+    return None
+
+
+@functools.lru_cache(maxsize=None)
+def commit_tree(common: Path, oid: str) -> bytes | None:
+    return _loose_commit_tree(common, oid) or _packed_commit_tree(common, oid)
+
+
+def _blob_oid(path: str, hash_len: int) -> bytes | None:
+    try:
+        with open(path, "rb") as f:
+            content = f.read()
+    except OSError:
+        return None
+    h = hashlib.sha1() if hash_len == 20 else hashlib.sha256()
+    h.update(b"blob %d\0" % len(content))
+    h.update(content)
+    return h.digest()
+
+
+def _entry_changed(entry: IndexEntry, st: os.stat_result, index_mtime: int, root: Path) -> bool | None:
+    """True/False if the file certainly differs/matches the index, None if only git can tell."""
+    if entry.mode & _S_IFMT != st.st_mode & _S_IFMT:
+        return True
+    if stat.S_ISREG(st.st_mode) and (entry.mode & 0o100) != (st.st_mode & 0o100):
+        return True
+    if entry.size != st.st_size & 0xFFFFFFFF:
+        return True
+    # Same rule as git: an entry written in the same second as the index can't be trusted
+    racy = entry.mtime >= index_mtime
+    same_stat = (
+        (entry.mtime, entry.mtime_ns) == divmod(st.st_mtime_ns, 1_000_000_000)
+        and entry.ino == st.st_ino & 0xFFFFFFFF
     )
+    if same_stat and not racy:
+        return False
+    # Racily clean, or touched with the same size: compare content hashes.
+    if stat.S_ISREG(st.st_mode) and _blob_oid(str(root / entry.name), len(entry.oid)) == entry.oid:
+        return False
+    return None  # could still be clean after clean/smudge filters
+
+
+def index_dirty(path: Path, common: Path, head_oid: str | None) -> bool | None:
+    """Fork-free "tracked changes" check for a worktree.
+
+    Compares the index's cache-tree root with HEAD's tree (staged changes)
+    and the stat data of every tracked file with the working tree, one
+    os.scandir per directory. Untracked files are not considered. Returns
+    None when the answer needs git (racy entries that fail the content
+    hash, unsupported index features, packed deltified HEAD commit).
+    """
+    gitdir = _worktree_git_dir(path)
+    if gitdir is None or head_oid is None:
+        return None
+    index_path = gitdir / "index"
+    try:
+        ist = os.stat(index_path)
+    except OSError:
+        return None
+    parsed = read_index(index_path, len(head_oid) // 2)
+    if parsed is None:
+        return None
+    entries, root_tree = parsed
+    head_tree = commit_tree(common, head_oid)
+    if root_tree is None or head_tree is None:
+        return None
+    if root_tree != head_tree:
+        return True
 
+    index_mtime = ist.st_mtime_ns // 1_000_000_000
+    by_dir: Dict[str, List[IndexEntry]] = {}
+    for entry in entries:
+        by_dir.setdefault(os.path.dirname(entry.name), []).append(entry)
 
-def build_rows(*, include_upstream: bool) -> List[str]:
-    w_branch = 35  # Fixed width for branch name
-    w_state, w_time, w_up = 6, 6, 7
+    uncertain = False
+    for rel_dir, dir_entries in by_dir.items():
+        try:
+            with os.scandir(path / rel_dir) as it:
+                listing = {e.name: e for e in it}
+        except OSError:
+            return True  # tracked directory is gone
+        for entry in dir_entries:
+            dent = listing.get(os.path.basename(entry.name))
+            if dent is None:
+                return True
+            changed = _entry_changed(entry, dent.stat(follow_symlinks=False), index_mtime, path)
+            if changed:
+                return True
+            uncertain = uncertain or changed is None
+    return None if uncertain else False
 
-    items: List[Tuple[Path, str]] = [(p, b) for p, b in worktrees() if p.exists()]
-    if not items:
-        return []
 
-    max_workers = min(32, (os.cpu_count() or 4) * 2, max(4, len(items)))
+# -----------------------------------------------------------------------------
+# worktree snapshots
+# -----------------------------------------------------------------------------
 
-    status_time: dict[Path, Tuple[bool, str]] = {}
-    upstream_ok: dict[Path, bool] = {}
+@dataclass
+class Snapshot:
+    """Per-worktree state gathered from a single `git status --porcelain=v2 --branch`."""
+
+    path: Path
+    branch: str
+    oid: str | None = None
+    upstream: str | None = None
+    ahead: int | None = None
+    behind: int | None = None
+    dirty: bool = False
+    failed: bool = False  # git status errored or timed out: state unknown, never cached
+
+    @property
+    def has_upstream(self) -> bool:
+        # branch.ab is only reported when the upstream ref actually exists
+        return self.ahead is not None
+
+    @property
+    def synced(self) -> bool:
+        return self.ahead == 0 and self.behind == 0
+
+    @property
+    def gone(self) -> bool:
+        """Upstream configured but deleted (typically: merged and the remote branch cleaned up)."""
+        return self.upstream is not None and self.ahead is None
+
+    def to_cache(self) -> dict:
+        d = asdict(self)
+        del d["path"], d["branch"], d["failed"]
+        return d
+
+
+async def snapshot(path: Path, branch: str) -> Snapshot:
+    snap = Snapshot(path, branch)
+    try:
+        p = await run_cmd(["git", "status", "--porcelain=v2", "--branch"], cwd=path)
+    except subprocess.TimeoutExpired:
+        p = None
+    if p is None or p.returncode != 0:
+        snap.failed = True
+        return snap
+    for line in p.stdout.splitlines():
+        if not line.startswith("# "):
+            # headers come first; any entry line means the worktree is dirty
+            snap.dirty = True
+            break
+        key, _, value = line[2:].partition(" ")
+        if key == "branch.oid" and value != "(initial)":
+            snap.oid = value
+        elif key == "branch.upstream":
+            snap.upstream = value
+        elif key == "branch.ab":
+            ahead, behind = value.split()
+            snap.ahead, snap.behind = int(ahead), -int(behind)
+    return snap
+
+
+def fast_snapshot(
+    path: Path,
+    branch: str,
+    common: Path,
+    packed: Dict[str, str],
+    upstreams: Dict[str, str],
+    status: BranchStatus | None = None,
+) -> Snapshot | None:
+    """Snapshot from refs and the index alone, or None when git has to be asked.
+
+    Dirty here means tracked changes only (see index_dirty). Ahead/behind is
+    known without git when HEAD and upstream point at the same commit, or
+    from the branch table when it was built for this tip.
+    """
+    oid = _resolve_ref(common, f"refs/heads/{branch}", packed)
+    if oid is None:
+        return None
+    snap = Snapshot(path, branch, oid=oid)
+    up_ref = upstreams.get(branch)
+    if up_ref:
+        snap.upstream = up_ref.removeprefix("refs/remotes/").removeprefix("refs/heads/")
+        up_oid = _resolve_ref(common, up_ref, packed)
+        if up_oid is not None:
+            if up_oid == oid:
+                snap.ahead = snap.behind = 0
+            elif status is not None and status.oid == oid and status.ahead is not None:
+                snap.ahead, snap.behind = status.ahead, status.behind
+            else:
+                return None
+    dirty = index_dirty(path, common, oid)
+    if dirty is None:
+        return None
+    snap.dirty = dirty
+    return snap
 
-    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as ex:
-        st_futs = {ex.submit(_status_and_time, p): p for p, _ in items}
-        for fut in concurrent.futures.as_completed(st_futs):
-            p = st_futs[fut]
-            try:
-                status_time[p] = fut.result()
-            except Exception:
-                status_time[p] = (False, "")
-
-        if include_upstream:
-            up_futs = {ex.submit(_has_upstream, p): p for p, _ in items}
-            for fut in concurrent.futures.as_completed(up_futs):
-                p = up_futs[fut]
+
+@dataclass
+class BranchStatus:
+    """One local branch, as seen by a single `git for-each-ref` pass."""
+
+    oid: str
+    time: str  # relative committer date of the tip
+    timestamp: int
+    upstream: str | None = None
+    ahead: int | None = None  # None: no upstream, or upstream gone
+    behind: int | None = None
+    gone: bool = False
+    merged: bool = False  # tip reachable from the base
+    squashed: bool = False  # base has a commit with the same patch-id as the whole branch
+
+
+_TRACK_RE = re.compile(r"(ahead|behind) (\d+)")
+
+
+SQUASH_WINDOW_DAYS = 90
+
+
+def squash_window() -> float:
+    """Seconds back from now that squash_merged looks (wt.squashWindow, in days)."""
+    try:
+        return float(config_get("wt.squashWindow") or SQUASH_WINDOW_DAYS) * 86400
+    except ValueError:
+        return SQUASH_WINDOW_DAYS * 86400
+
+
+def branch_created_at(branch: str) -> str | None:
+    """The commit a branch was created at: the new-oid of its first reflog entry."""
+    log = git_common_dir() / "logs" / "refs" / "heads" / branch
+    try:
+        with open(log) as f:
+            first = f.readline().split(" ", 2)
+    except OSError:
+        return None
+    return first[1] if len(first) > 2 else None
+
+
+def default_base() -> str:
+    """What branches get merged into: wt.base, origin/HEAD, else the main worktree's branch."""
+    base = config_get("wt.base")
+    if base:
+        return base
+    common = git_common_dir()
+    origin_head = _read_text(common / "refs" / "remotes" / "origin" / "HEAD") or ""
+    if origin_head.startswith("ref: refs/remotes/"):
+        return origin_head.removeprefix("ref: refs/remotes/")
+    return _head_branch(common) or "HEAD"
+
+
+async def branch_table(
+    *, track: bool = True, merged_into: str | None = None, squash: Iterable[str] = ()
+) -> Dict[str, BranchStatus]:
+    """Status of every local branch: one for-each-ref, plus one more for `merged_into`.
+
+    `track` adds ahead/behind counts (git walks each diverged branch);
+    `squash` names the branches (if unmerged) to check for squash merges (see
+    squash_merged), which costs a diff per branch.
+    """
+    fields = ["%(refname:lstrip=2)", "%(objectname)", "%(committerdate:relative)", "%(committerdate:unix)"]
+    if track:
+        fields += ["%(upstream:short)", "%(upstream:track,nobracket)"]
+    fmt = "%00".join(fields)
+    listing = agit("for-each-ref", f"--format={fmt}", "refs/heads", check=False)
+    if merged_into is None:
+        out, merged_out = await listing, ""
+    else:
+        merged = agit("for-each-ref", f"--merged={merged_into}", "--format=%(refname:lstrip=2)", "refs/heads", check=False)
+        out, merged_out = await asyncio.gather(listing, merged)
+
+    table: Dict[str, BranchStatus] = {}
+    for line in out.splitlines():
+        name, oid, rel, ts, *rest = line.split("\0")
+        st = BranchStatus(oid, rel, int(ts or 0))
+        if rest and rest[0]:
+            st.upstream = rest[0]
+            st.gone = rest[1] == "gone"
+            if not st.gone:
+                counts = dict(_TRACK_RE.findall(rest[1]))
+                st.ahead, st.behind = int(counts.get("ahead", 0)), int(counts.get("behind", 0))
+        table[name] = st
+    for name in merged_out.splitlines():
+        if name in table:
+            table[name].merged = True
+    if merged_into is not None and squash:
+        candidates = {n: table[n] for n in set(squash) if n in table and not table[n].merged}
+        for name in await squash_merged(merged_into, candidates):
+            table[name].squashed = True
+    return table
+
+
+async def _patch_ids(patches: str) -> Dict[str, str]:
+    """commit id -> patch-id, for a stream of `commit <id>` headed diffs."""
+    if not patches.strip():
+        return {}
+    out = await ash(["git", "patch-id", "--stable"], input=patches, check=False)
+    ids: Dict[str, str] = {}
+    for line in out.splitlines():
+        pid, _, commit = line.partition(" ")
+        ids[commit] = pid
+    return ids
+
+
+async def squash_merged(base: str, candidates: Dict[str, BranchStatus]) -> set[str]:
+    """Branches whose combined diff landed on `base` as a single commit.
+
+    The base side is one `git log -p` back to the oldest candidate tip; each
+    branch contributes one `git diff base...branch`; all patch-ids come from
+    one `git patch-id` over the lot. Branches whose tip is older than
+    squash_window() are never candidates, which bounds that log; a git call
+    that times out counts as "not squash-merged".
+    """
+    cutoff = int(time.time() - squash_window())
+    candidates = {n: st for n, st in candidates.items() if st.timestamp >= cutoff}
+    if not candidates:
+        return set()
+    since = min(st.timestamp for st in candidates.values())
+    base_log = agit("log", "--no-merges", "--no-color", "--no-ext-diff", "-p", "--format=commit %H", f"--since={since}", base, check=False)
+    diffs = [agit("diff", "--no-color", "--no-ext-diff", f"{base}...{st.oid}", check=False) for st in candidates.values()]
+    tasks = [asyncio.ensure_future(c) for c in (base_log, *diffs)]
+    try:
+        log, *branch_diffs = await asyncio.gather(*tasks)
+    except subprocess.TimeoutExpired:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        return set()
+    combined = "".join(
+        f"commit {st.oid}\n{diff}\n" for st, diff in zip(candidates.values(), branch_diffs) if diff
+    )
+    try:
+        landed = set((await _patch_ids(log)).values())
+        branch_ids = await _patch_ids(combined)
+    except subprocess.TimeoutExpired:
+        return set()
+    return {name for name, st in candidates.items() if branch_ids.get(st.oid) in landed}
+
+
+RefView = Tuple[Path, Dict[str, str], Dict[str, str]]  # common dir, packed refs, upstreams
+
+
+def ref_view() -> RefView:
+    common = git_common_dir()
+    return common, _packed_refs(common), _upstream_refs()
+
+
+async def _snapshot_task(
+    path: Path, branch: str, fast: RefView | None, table: Dict[str, BranchStatus] | None
+) -> Snapshot:
+    if fast is not None:
+        status = table.get(branch) if table else None
+        snap = await asyncio.to_thread(fast_snapshot, path, branch, *fast, status)
+        if snap is not None:
+            return snap
+    return await snapshot(path, branch)
+
+
+async def iter_snapshots(
+    items: List[Tuple[Path, str]], fast: RefView | None = None, table: Dict[str, BranchStatus] | None = None
+) -> AsyncIterator[Snapshot]:
+    """Yield snapshots in completion order; closing the iterator kills pending git calls.
+
+    With `fast`, each worktree first tries the fork-free fast_snapshot, taking
+    ahead/behind for diverged branches from `table`.
+    """
+    tasks = {asyncio.ensure_future(_snapshot_task(p, b, fast, table)): (p, b) for p, b in items}
+    pending = set(tasks)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
                 try:
-                    upstream_ok[p] = fut.result()
+                    yield task.result()
                 except Exception:
-                    upstream_ok[p] = False
+                    yield Snapshot(*tasks[task], failed=True)
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
 
-    rows: List[str] = []
-    for path, branch in items:
-        dirty, raw_time = status_time.get(path, (False, ""))
-        state = f"{C.RED}dirty{C.RESET}" if dirty else f"{C.GREEN}clean{C.RESET}"
-        time = f"{C.YELLOW}{short_time(raw_time)}{C.RESET}" if raw_time else ""
 
-        if include_upstream:
-            has_up = upstream_ok.get(path, False)
-            upstream = f"{C.BLUE}up{C.RESET}" if has_up else f"{C.MAGENTA}local{C.RESET}"
-        else:
-            upstream = ""
+async def snapshots(items: List[Tuple[Path, str]]) -> Dict[Path, Snapshot]:
+    return {snap.path: snap async for snap in iter_snapshots(items)}
 
-        line1 = (
-            f"{truncate_right(branch, w_branch)}"
-            f"{pad_ansi(state, w_state)} "
-            f"{pad_ansi(time, w_time)} "
-            f"{pad_ansi(upstream, w_up)}"
-        )
-        line2 = f"{C.DIM}{relpath(path)}{C.RESET}"
-        rows.append(f"{line1}\n{line2}\t{path}\t{branch}")
 
-    return rows
+def format_upstream(snap: Snapshot) -> str:
+    if snap.gone:
+        return f"{C.YELLOW}gone{C.RESET}"
+    if not snap.has_upstream:
+        return f"{C.MAGENTA}local{C.RESET}"
+    if snap.synced:
+        return f"{C.BLUE}up{C.RESET}"
+    ab = (f"↑{snap.ahead}" if snap.ahead else "") + (f"↓{snap.behind}" if snap.behind else "")
+    return f"{C.BLUE}{ab}{C.RESET}"
+
+
+def format_row(snap: Snapshot, raw_time: str, *, include_upstream: bool, size: int | None = None) -> str:
+    w_branch = 35  # Fixed width for branch name
+    w_state, w_time, w_up, w_size = 6, 6, 7, 9
+
+    if snap.failed:
+        state = f"{C.YELLOW}error{C.RESET}"
+    else:
+        state = f"{C.RED}dirty{C.RESET}" if snap.dirty else f"{C.GREEN}clean{C.RESET}"
+    age = f"{C.YELLOW}{short_time(raw_time)}{C.RESET}" if raw_time else ""
+    upstream = format_upstream(snap) if include_upstream else ""
+
+    line1 = (
+        f"{truncate_right(snap.branch, w_branch)}"
+        f"{pad_ansi(state, w_state)} "
+        f"{pad_ansi(age, w_time)} "
+        f"{pad_ansi(upstream, w_up)}"
+    )
+    if size is not None:
+        line1 += f"{C.DIM}{_human_bytes(size):>{w_size}}{C.RESET}"
+    line2 = f"{C.DIM}{relpath(snap.path)}{C.RESET}"
+    return f"{line1}\n{line2}\t{snap.path}\t{snap.branch}"
+
+
+def list_items() -> List[Tuple[Path, str]]:
+    return [(p, b) for p, b in worktrees() if p.exists()]
+
+
+async def iter_rows(
+    items: List[Tuple[Path, str]], *, include_upstream: bool, use_cache: bool = True
+) -> AsyncIterator[Tuple[int, str]]:
+    """Yield (index, row) pairs as soon as each row is ready.
+
+    Cached rows come first, in worktree order; the rest follow in the order
+    their git status finishes. Whatever completed is written back to the
+    cache even if the consumer stops early (e.g. fzf exited). Sizes
+    (wt.showSize) are the last measurement's; a stale one is refreshed by a
+    background `du` once the rows are out.
+    """
+    if not items:
+        return
+    index = {p: i for i, (p, _) in enumerate(items)}
+
+    fast = config_bool("wt.fastStatus")
+    entries: Dict[str, dict] = {}
+    fingerprints: Dict[Path, List[object] | None] = {}
+    cache_path: Path | None = None
+    if use_cache or fast:
+        common, packed, upstreams = refs = ref_view()
+    if use_cache:
+        cache_path = common / CACHE_FILE
+        entries = _load_cache(cache_path)
+        fingerprints = {p: _fingerprint(p, b, common, packed, upstreams) for p, b in items}
+
+    table = await branch_table(track=fast and include_upstream)
+    times = {name: st.time for name, st in table.items()}
+    sizes: Dict[Path, int] = {}
+    sizes_age = 0.0
+    if config_bool("wt.showSize"):
+        sizes, sizes_age = cached_sizes()
+    stale: List[Tuple[Path, str]] = []
+    fresh: Dict[Path, Snapshot] = {}
+    try:
+        for path, branch in items:
+            entry = entries.get(str(path))
+            if use_cache and _cache_valid(entry, fingerprints[path]):
+                CACHE_STATS["hit"] += 1
+                snap = Snapshot(path, branch, **entry["snap"])
+                yield index[path], format_row(
+                    snap, times.get(branch, ""), include_upstream=include_upstream, size=sizes.get(path)
+                )
+            else:
+                CACHE_STATS["miss"] += 1
+                stale.append((path, branch))
+
+        snaps = iter_snapshots(stale, refs if fast else None, table)
+        try:
+            async for snap in snaps:
+                if not snap.failed:
+                    fresh[snap.path] = snap
+                yield index[snap.path], format_row(
+                    snap, times.get(snap.branch, ""), include_upstream=include_upstream, size=sizes.get(snap.path)
+                )
+        finally:
+            await snaps.aclose()
+    finally:
+        if sizes_age > SIZE_TTL:
+            spawn_detached("du")
+        if cache_path is not None and fresh:
+            # git status may refresh the index, so fingerprint after querying
+            for path, snap in fresh.items():
+                fingerprints[path] = _fingerprint(path, snap.branch, common, packed, upstreams)
+            now = time.time()
+            saved: Dict[str, dict] = {}
+            for path, _ in items:
+                key = str(path)
+                if path in fresh:
+                    saved[key] = {"fp": fingerprints[path], "at": now, "snap": fresh[path].to_cache()}
+                elif key in entries:
+                    saved[key] = entries[key]
+            _save_cache(cache_path, saved)
+
+
+def build_rows(*, include_upstream: bool, use_cache: bool = True) -> List[str]:
+    async def collect() -> List[Tuple[int, str]]:
+        rows = iter_rows(list_items(), include_upstream=include_upstream, use_cache=use_cache)
+        return [r async for r in rows]
+
+    return [row for _, row in sorted(run(collect()))]
+
+
+Sink = Callable[[str], Awaitable[None]]
+
+
+async def stdout_sink(data: str) -> None:
+    sys.stdout.write(data)
+    sys.stdout.flush()
+
+
+async def stream_rows(sink: Sink, items: List[Tuple[Path, str]], *, include_upstream: bool, use_cache: bool = True) -> None:
+    """Send NUL-terminated rows to `sink` in list order, each as soon as it and
+    every row before it are ready. Stops quietly if the reader goes away.
+
+    fzf ranks ties by arrival, so rows that finish early are held back rather
+    than sent out of order.
+    """
+    rows = iter_rows(items, include_upstream=include_upstream, use_cache=use_cache)
+    held: Dict[int, str] = {}
+    sent = 0
+    try:
+        async for i, row in rows:
+            held[i] = row
+            while sent in held:
+                await sink(held.pop(sent) + "\0")
+                sent += 1
+    except (BrokenPipeError, ConnectionResetError):
+        # Silence the flush at interpreter exit as well (see Python's SIGPIPE notes)
+        if sink is stdout_sink:
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+    finally:
+        await rows.aclose()
+
+
+async def list_rows(*, detailed: bool, use_cache: bool = True) -> None:
+    """The hidden --__list mode: rows on stdout, from the daemon when one is up."""
+    if use_cache and await daemon_stream(stdout_sink, detailed=detailed):
+        return
+    await stream_rows(stdout_sink, list_items(), include_upstream=detailed, use_cache=use_cache)
 
 
 # -----------------------------------------------------------------------------
 # interactive selector
 # -----------------------------------------------------------------------------
 
-def select_worktree() -> Tuple[Path, str] | None:
+# Previews are plain text files in $GIT_COMMON_DIR/wt-preview/, one per
+# worktree, named after its path with "/" replaced by "%" so fzf's preview
+# command is a `cat` with no lookup logic. index.json maps each path to the
+# status fingerprint its file was built from.
+
+PREVIEW_DIR = "wt-preview"
+PREVIEW_LOG_LINES = 8
+
+
+def _preview_file(preview_dir: Path, path: Path) -> Path:
+    return preview_dir / str(path).replace("/", "%")
+
+
+def preview_command(preview_dir: Path) -> str:
+    """fzf --preview command: field 2 of a row is the worktree path."""
+    d = shlex.quote(str(preview_dir))
+    return f"cat {d}/\"$(printf %s {{2}} | tr / %)\" 2>/dev/null || echo 'summarizing...'"
+
+
+async def summarize(path: Path, branch: str, st: BranchStatus | None) -> str:
+    log, stat = await asyncio.gather(
+        agit(
+            "log", "--color=always", "--format=%C(yellow)%h%C(reset) %s %C(dim)%cr%C(reset)",
+            f"-n{PREVIEW_LOG_LINES}", cwd=path, check=False,
+        ),
+        agit("diff", "--color=always", "--stat=72", "HEAD", cwd=path, check=False),
+    )
+    if st is None or st.upstream is None:
+        sync = f"{C.MAGENTA}no upstream{C.RESET}"
+    elif st.gone:
+        sync = f"{C.YELLOW}{st.upstream} (gone){C.RESET}"
+    else:
+        sync = f"{C.BLUE}{st.upstream} ↑{st.ahead} ↓{st.behind}{C.RESET}"
+    changes = stat or f"{C.GREEN}no tracked changes{C.RESET}"
+    return f"{C.GREEN}{branch}{C.RESET}  {sync}\n{C.DIM}{relpath(path)}{C.RESET}\n\n{log}\n\n{changes}\n"
+
+
+async def precompute_previews(items: List[Tuple[Path, str]], preview_dir: Path) -> None:
+    """Write a summary file per worktree, in list order, skipping ones still current."""
+    preview_dir.mkdir(exist_ok=True)
+    index_path = preview_dir / "index.json"
+    try:
+        index: Dict[str, dict] = json.loads(index_path.read_text())
+    except (OSError, ValueError):
+        index = {}
+    common, packed, upstreams = ref_view()
+    fps = {p: _fingerprint(p, b, common, packed, upstreams) for p, b in items}
+    todo = [(p, b) for p, b in items if not _cache_valid(index.get(str(p)), fps[p])]
+    if not todo:
+        return
+    table = await branch_table()
+    fresh: Dict[str, dict] = {}
+
+    async def one(path: Path, branch: str) -> None:
+        text = await summarize(path, branch, table.get(branch))
+        target = _preview_file(preview_dir, path)
+        tmp = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+        tmp.write_text(text)
+        os.replace(tmp, target)
+        fresh[str(path)] = {"fp": _fingerprint(path, branch, common, packed, upstreams), "at": time.time()}
+
+    try:
+        # gather starts them in list order, so the rows fzf shows first are summarized first
+        await asyncio.gather(*(one(p, b) for p, b in todo))
+    finally:
+        if fresh:
+            keep = {str(p) for p, _ in items}
+            index = {k: v for k, v in index.items() if k in keep}
+            index.update(fresh)
+            with contextlib.suppress(OSError):
+                index_path.write_text(json.dumps(index))
+
+
+async def select_worktree(*, use_cache: bool = True, preview: bool = False) -> Tuple[Path, str] | None:
     """Interactive worktree selector. Returns (path, branch) or None."""
-    rows = build_rows(include_upstream=True)
-    if not rows:
+    items = list_items()
+    if not items:
         return None
+    preview_dir = git_common_dir() / PREVIEW_DIR
+    preview_args = ["--preview", preview_command(preview_dir), "--preview-window=right,55%,wrap"] if preview else []
 
     self_path = Path(sys.argv[0])
     self_cmd = shlex.quote(str(self_path.resolve())) if self_path.exists() else shlex.quote(sys.argv[0])
     reload_cmd = f"{self_cmd} --__list --__detailed"
-
-    p = subprocess.run(
-        [
-            "fzf",
-            "--ansi",
-            "--read0",
-            "--multi-line",
-            "--delimiter=\t",
-            "--with-nth=1",
-            "--gap",
-            "--highlight-line",
-            "--no-select-1",
-            "--bind",
-            f"ctrl-r:reload({reload_cmd})",
-        ],
-        input="\0".join(rows) + "\0",
-        text=True,
+    if not use_cache:
+        reload_cmd += " --no-cache"
+
+    # Start fzf immediately and feed it rows as they finish, in list order;
+    # --tiebreak=index keeps filtered results in that order.
+    p = await asyncio.create_subprocess_exec(
+        "fzf",
+        "--ansi",
+        "--read0",
+        "--multi-line",
+        "--delimiter=\t",
+        "--with-nth=1",
+        "--gap",
+        "--highlight-line",
+        "--no-select-1",
+        "--tiebreak=index",
+        "--bind",
+        f"ctrl-r:reload({reload_cmd})",
+        *preview_args,
+        stdin=subprocess.PIPE,
         stdout=subprocess.PIPE,
     )
-    if not p.stdout:
+    assert p.stdin is not None and p.stdout is not None
+    stdin = p.stdin
+
+    async def fzf_sink(data: str) -> None:
+        stdin.write(data.encode())
+        await stdin.drain()
+
+    async def feed() -> None:
+        try:
+            if not (use_cache and await daemon_stream(fzf_sink, detailed=True)):
+                await stream_rows(fzf_sink, items, include_upstream=True, use_cache=use_cache)
+        finally:
+            with contextlib.suppress(BrokenPipeError, ConnectionResetError):
+                stdin.close()
+
+    feeder = asyncio.ensure_future(feed())
+    background = [feeder]
+    if preview:
+        background.append(asyncio.ensure_future(precompute_previews(items, preview_dir)))
+    selected = (await p.stdout.read()).decode()
+    await p.wait()
+    # fzf is gone: stop any git status (or summary) still running for rows nobody will see
+    for task in background:
+        task.cancel()
+    await asyncio.gather(*background, return_exceptions=True)
+    if not selected:
         return None
 
-    parts = p.stdout.rstrip("\n").split("\t")
+    parts = selected.rstrip("\n").split("\t")
     return Path(parts[-2]), parts[-1]
 
 
-def interactive(remove: bool, print_path: bool, force: bool = False) -> None:
-    result = select_worktree()
+async def interactive(
+    remove: bool, print_path: bool, force: bool = False, *, use_cache: bool = True, preview: bool = False
+) -> None:
+    result = await select_worktree(use_cache=use_cache, preview=preview)
     if result is None:
         return
 
     selected, branch = result
     if remove:
-        # Check if branch is fully merged before removing anything
+        snap = await snapshot(selected, branch)
+        if snap.failed and not force:
+            sys.exit(f"{C.RED}Couldn't read the status of worktree '{branch}'. Use -rf to force remove.{C.RESET}")
+        if snap.dirty and not force:
+            sys.exit(f"{C.RED}Worktree '{branch}' has uncommitted changes. Use -rf to force remove.{C.RESET}")
+
+        # Check if branch is fully (or squash-) merged before removing anything
+        squashed = False
         if not force:
-            check = subprocess.run(
-                ["git", "merge-base", "--is-ancestor", branch, "HEAD"],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-            )
-            if check.returncode != 0:
+            st = (await branch_table(track=False, merged_into="HEAD")).get(branch)
+            if st is not None and not st.merged:
+                squashed = branch in await squash_merged("HEAD", {branch: st})
+            if st is None or not (st.merged or squashed):
                 sys.exit(f"{C.RED}Branch '{branch}' is not fully merged. Use -rf to force delete.{C.RESET}")
 
         # Get main repo path before removing worktree (in case we're inside it)
         main_repo = main_worktree()
-        remove_args = ["worktree", "remove"]
-        if force:
-            remove_args.append("--force")
-        remove_args.append(str(selected))
-        git(*remove_args, cwd=main_repo)
-        delete_flag = "-D" if force else "-d"
-        del_result = subprocess.run(
-            ["git", "branch", delete_flag, branch],
-            cwd=main_repo,
-            text=True,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-        )
+        err = await discard_worktree(selected, force=force, cwd=main_repo)
+        if err is not None:
+            sys.exit(err)
+        if trash_dir().is_dir():
+            spawn_detached("reap")
+        # git branch -d only knows ancestry; a squash merge needs -D
+        delete_flag = "-D" if force or squashed else "-d"
+        del_result = await run_cmd(["git", "branch", delete_flag, branch], cwd=main_repo, timeout=None)
         if del_result.returncode == 0:
             print(del_result.stdout.rstrip())
         else:
@@ -441,10 +2739,452 @@ def interactive(remove: bool, print_path: bool, force: bool = False) -> None:
         print(selected)
 
 
+# -----------------------------------------------------------------------------
+# maintain
+# -----------------------------------------------------------------------------
+#
+# Each step turns on one setting in the shared config, applies it to every
+# worktree, then re-times build_rows (uncached), so the report shows what
+# that step alone saved. Results are appended to $GIT_COMMON_DIR/wt-maintain.log.
+
+MAINTAIN_LOG = "wt-maintain.log"
+MAINTAIN_RUNS = 3  # build_rows timings per step; the best one is reported
+
+
+@dataclass
+class MaintainStep:
+    name: str
+    config: List[Tuple[str, str]]
+    repo_cmds: List[List[str]]  # run once, in the main worktree
+    worktree_cmds: List[List[str]]  # run in every worktree
+
+
+MAINTAIN_STEPS = [
+    MaintainStep(
+        "commit-graph",
+        [("core.commitGraph", "true"), ("fetch.writeCommitGraph", "true"), ("gc.writeCommitGraph", "true")],
+        [["commit-graph", "write", "--reachable", "--changed-paths"]],
+        [],
+    ),
+    MaintainStep("multi-pack-index", [("core.multiPackIndex", "true")], [["multi-pack-index", "write"]], []),
+    MaintainStep("untracked-cache", [("core.untrackedCache", "true")], [], [["update-index", "--untracked-cache"]]),
+    MaintainStep("index-v4", [("index.version", "4")], [], [["update-index", "--index-version", "4"]]),
+    MaintainStep("fsmonitor", [("core.fsmonitor", "true")], [], [["fsmonitor--daemon", "start"]]),
+]
+
+
+def _time_build_rows() -> Tuple[float, int]:
+    """Best-of-N wall time and process count of an uncached build_rows."""
+    best = float("inf")
+    spawned = 0
+    for _ in range(MAINTAIN_RUNS):
+        before = len(TRACER.events)
+        t0 = time.perf_counter()
+        build_rows(include_upstream=True, use_cache=False)
+        best = min(best, time.perf_counter() - t0)
+        spawned = len(TRACER.events) - before
+    return best, spawned
+
+
+async def _apply_step(step: MaintainStep, items: List[Tuple[Path, str]]) -> List[str]:
+    """Apply one step; returns error lines (empty on success)."""
+    main = main_worktree()
+    errors: List[str] = []
+    for key, value in step.config:
+        await agit("config", "--local", key, value, cwd=main)
+    for cmd in step.repo_cmds:
+        p = await run_cmd(["git", *cmd], cwd=main, timeout=None)
+        if p.returncode != 0:
+            errors.append(f"git {' '.join(cmd)}: {p.stderr.strip()}")
+
+    async def each(path: Path) -> None:
+        for cmd in step.worktree_cmds:
+            p = await run_cmd(["git", *cmd], cwd=path, timeout=None)
+            if p.returncode != 0:
+                errors.append(f"{relpath(path)}: git {' '.join(cmd)}: {p.stderr.strip()}")
+
+    await asyncio.gather(*(each(p) for p, _ in items))
+    _config.cache_clear()
+    return errors
+
+
+async def _fsmonitor_supported() -> bool:
+    p = await run_cmd(["git", "fsmonitor--daemon", "status"])
+    return "not supported" not in p.stderr
+
+
+async def verify_worktree(path: Path) -> Dict[str, object]:
+    """Effective settings as this worktree sees them, plus what its index actually uses."""
+    out = await agit("config", "--list", cwd=path, check=False)
+    cfg: Dict[str, str] = {}
+    for line in out.splitlines():
+        key, _, value = line.partition("=")
+        cfg[key.lower()] = value
+    gitdir = _worktree_git_dir(path)
+    info = index_features(gitdir / "index") if gitdir else None
+    return {
+        "commitGraph": cfg.get("core.commitgraph") == "true",
+        "untrackedCache": info is not None and "UNTR" in info[1],
+        "indexVersion": info[0] if info else None,
+        "fsmonitor": cfg.get("core.fsmonitor") == "true",
+    }
+
+
+def cmd_maintain(dry_run: bool = False) -> None:
+    items = list_items()
+    TRACER.enabled = True  # counts processes per timing run
+    steps = list(MAINTAIN_STEPS)
+    if not run(_fsmonitor_supported()):
+        print(f"{C.DIM}fsmonitor: not supported by this git/platform, skipped{C.RESET}", file=sys.stderr)
+        steps = [s for s in steps if s.name != "fsmonitor"]
+
+    async def verify_all() -> List[Dict[str, object]]:
+        return list(await asyncio.gather(*(verify_worktree(p) for p, _ in items)))
+
+    def show(states: List[Dict[str, object]]) -> None:
+        for (path, branch), st in zip(items, states):
+            flags = "  ".join(
+                f"{C.GREEN if ok else C.DIM}{name}{C.RESET}"
+                for name, ok in (
+                    ("commit-graph", st["commitGraph"]),
+                    ("untracked-cache", st["untrackedCache"]),
+                    (f"index-v{st['indexVersion'] or '?'}", st["indexVersion"] == 4),
+                    ("fsmonitor", st["fsmonitor"]),
+                )
+            )
+            print(f"  {truncate_right(branch, 35)}{flags}")
+
+    print(f"{len(items)} worktrees, current settings:")
+    show(run(verify_all()))
+    if dry_run:
+        return
+
+    secs, procs = _time_build_rows()
+    timings = [{"step": "baseline", "seconds": round(secs, 4), "processes": procs}]
+    print(f"\n{'baseline':<18}{secs:7.3f}s  {C.DIM}build_rows, {procs} processes{C.RESET}")
+    for step in steps:
+        errors = run(_apply_step(step, items))
+        for err in errors:
+            print(f"{C.RED}{err}{C.RESET}", file=sys.stderr)
+        build_rows(include_upstream=True, use_cache=False)  # warm-up: lets status write new index extensions
+        secs, procs = _time_build_rows()
+        saved = timings[-1]["seconds"] - secs  # type: ignore[operator]
+        timings.append({"step": step.name, "seconds": round(secs, 4), "processes": procs, "errors": len(errors)})
+        color = C.GREEN if saved > 0 else C.DIM
+        print(f"{step.name:<18}{secs:7.3f}s  {color}{saved:+.3f}s{C.RESET}")
+
+    print("\nverified:")
+    show(run(verify_all()))
+    with open(git_common_dir() / MAINTAIN_LOG, "a") as f:
+        f.write(json.dumps({"at": time.time(), "worktrees": len(items), "timings": timings}) + "\n")
+
+
+# -----------------------------------------------------------------------------
+# status daemon
+# -----------------------------------------------------------------------------
+
+DAEMON_POLL = 2.0  # seconds between fingerprint sweeps without inotify
+DAEMON_DEBOUNCE = 0.1
+DAEMON_CONNECT_TIMEOUT = 0.2
+
+_IN_EVENTS = 0x2 | 0x4 | 0x8 | 0x80 | 0x100 | 0x200  # MODIFY ATTRIB CLOSE_WRITE MOVED_TO CREATE DELETE
+
+
+def daemon_socket_path() -> Path:
+    # sun_path is ~100 bytes, so the socket can't live under a deep .git dir
+    runtime = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    key = hashlib.sha1(str(git_common_dir()).encode()).hexdigest()[:12]
+    return Path(runtime) / f"gwt-{os.getuid()}-{key}.sock"
+
+
+def _own_socket(sock: Path) -> bool:
+    """True if sock is a socket we own. Outside XDG_RUNTIME_DIR the name is
+    predictable in a shared /tmp, where anyone could have bound it first."""
+    try:
+        st = sock.lstat()
+    except OSError:
+        return False
+    return stat.S_ISSOCK(st.st_mode) and st.st_uid == os.getuid()
+
+
+class _Inotify:
+    """Minimal inotify binding; we only care *that* something changed, not what."""
+
+    def __init__(self) -> None:
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watches: Dict[Path, int] = {}
+
+    @classmethod
+    def create(cls) -> _Inotify | None:
+        if not sys.platform.startswith("linux"):
+            return None
+        try:
+            return cls()
+        except (OSError, AttributeError):
+            return None
+
+    def sync(self, dirs: Iterable[Path]) -> None:
+        wanted = set(dirs)
+        for d in set(self.watches) - wanted:
+            self._libc.inotify_rm_watch(self.fd, self.watches.pop(d))
+        for d in wanted - set(self.watches):
+            wd = self._libc.inotify_add_watch(self.fd, os.fsencode(d), _IN_EVENTS)
+            if wd >= 0:
+                self.watches[d] = wd
+
+    def drain(self) -> None:
+        with contextlib.suppress(BlockingIOError):
+            while os.read(self.fd, 65536):
+                pass
+
+
+@dataclass
+class _ModelEntry:
+    fp: List[object] | None
+    at: float
+    snap: Snapshot
+
+
+class WorktreeModel:
+    """Warm snapshots of every worktree, refreshed only where fingerprints change."""
+
+    def __init__(self) -> None:
+        self.entries: Dict[Path, _ModelEntry] = {}
+        self.items: List[Tuple[Path, str]] = []
+        self.refreshes = 0
+        self._lock = asyncio.Lock()
+        self._pending: asyncio.TimerHandle | None = None
+        self._task: asyncio.Task[None] | None = None
+        self.sizes, age = cached_sizes()
+        self._sized_at = time.monotonic() - age
+        self._sizing: asyncio.Task[None] | None = None
+
+    def watched_dirs(self) -> List[Path]:
+        common = git_common_dir()
+        dirs = [common, common / "worktrees"]
+        dirs += [d for d in (_worktree_git_dir(p) for p, _ in self.items) if d is not None]
+        return [d for d in dirs if d.is_dir()]
+
+    async def refresh(self) -> None:
+        async with self._lock:
+            _config.cache_clear()  # branch upstreams or wt.* may have changed
+            self.items = list_items()
+            common, packed, upstreams = refs = ref_view()
+            now = time.time()
+            fps = {p: _fingerprint(p, b, common, packed, upstreams) for p, b in self.items}
+            stale = [
+                (p, b)
+                for p, b in self.items
+                if p not in self.entries
+                or fps[p] is None
+                or self.entries[p].fp != fps[p]
+                or now - self.entries[p].at > CACHE_TTL
+            ]
+            fast = config_bool("wt.fastStatus")
+            table = await branch_table() if fast and stale else None
+            fresh = {s.path: s async for s in iter_snapshots(stale, refs if fast else None, table)}
+            self.entries = {p: self.entries[p] for p, _ in self.items if p in self.entries}
+            for path, snap in fresh.items():
+                # git status may refresh the index, so fingerprint after querying.
+                # A failed snapshot is listed as "error" but has no fingerprint,
+                # so the next refresh asks git again rather than trusting it
+                fp = None if snap.failed else _fingerprint(path, snap.branch, common, packed, upstreams)
+                self.entries[path] = _ModelEntry(fp, time.time(), snap)
+            self.refreshes += bool(stale)
+
+    def invalidate(self) -> None:
+        """Debounced refresh; bursts of events (index.lock, rename) coalesce into one."""
+        loop = asyncio.get_running_loop()
+        if self._pending is not None:
+            self._pending.cancel()
+        self._pending = loop.call_later(DAEMON_DEBOUNCE, self._start_refresh)
+
+    def _start_refresh(self) -> None:
+        self._pending = None
+        self._task = asyncio.ensure_future(self.refresh())
+
+    async def settled(self) -> None:
+        if self._task is not None:
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def measure(self) -> None:
+        roots = [p for p, _ in self.items]
+        self.sizes = dict(zip(roots, await asyncio.to_thread(worktree_sizes, roots)))
+        self._sized_at = time.monotonic()
+
+    async def rows(self, *, detailed: bool) -> List[str]:
+        if self._pending is not None:
+            # an event is still being debounced; don't answer from before it
+            self._pending.cancel()
+            self._start_refresh()
+        await self.settled()
+        table = await branch_table(track=False)
+        sizes: Dict[Path, int] = {}
+        if config_bool("wt.showSize"):
+            # answer with the last sizes; a walk of node_modules is too slow to wait for
+            sizes = self.sizes
+            idle = self._sizing is None or self._sizing.done()
+            if idle and time.monotonic() - self._sized_at > SIZE_TTL:
+                self._sizing = asyncio.ensure_future(self.measure())
+        return [
+            format_row(
+                self.entries[p].snap, table[b].time if b in table else "", include_upstream=detailed, size=sizes.get(p)
+            )
+            for p, b in self.items
+            if p in self.entries
+        ]
+
+
+async def _serve_client(model: WorktreeModel, stop: asyncio.Event, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        req = json.loads(await reader.readline() or b"{}")
+        op = req.get("op")
+        if op == "list":
+            rows = await model.rows(detailed=bool(req.get("detailed")))
+            writer.write("".join(row + "\0" for row in rows).encode())
+        elif op == "status":
+            info = {"pid": os.getpid(), "worktrees": len(model.items), "refreshes": model.refreshes}
+            writer.write(json.dumps(info).encode())
+        elif op == "stop":
+            stop.set()
+        await writer.drain()
+    except (ValueError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def cmd_daemon() -> None:
+    sock = daemon_socket_path()
+    if await daemon_request({"op": "status"}) is not None:
+        sys.exit(f"daemon already running on {sock}")
+    if os.path.lexists(sock) and not _own_socket(sock):
+        sys.exit(f"{sock} exists and isn't our socket; remove it or set XDG_RUNTIME_DIR")
+    sock.unlink(missing_ok=True)  # left behind by a daemon that didn't exit cleanly
+
+    model = WorktreeModel()
+    await model.refresh()
+    stop = asyncio.Event()
+    old_umask = os.umask(0o177)  # created 0600; a chmod after bind would leave a window
+    try:
+        server = await asyncio.start_unix_server(functools.partial(_serve_client, model, stop), path=str(sock))
+    finally:
+        os.umask(old_umask)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    inotify = _Inotify.create()
+    if inotify is not None:
+        inotify.sync(model.watched_dirs())
+
+        def on_event() -> None:
+            inotify.drain()
+            model.invalidate()
+
+        loop.add_reader(inotify.fd, on_event)
+    mode = "inotify" if inotify else f"polling every {DAEMON_POLL:g}s"
+    print(f"gwt daemon: {len(model.items)} worktrees, {mode}, listening on {sock}", file=sys.stderr)
+
+    # Fingerprints can't see unstaged edits, so sweep every CACHE_TTL even with inotify
+    interval = CACHE_TTL if inotify else DAEMON_POLL
+    try:
+        while not stop.is_set():
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(stop.wait(), interval)
+            if not stop.is_set():
+                model.invalidate()
+            await model.settled()
+            if inotify is not None:
+                inotify.sync(model.watched_dirs())
+    finally:
+        server.close()
+        await server.wait_closed()
+        sock.unlink(missing_ok=True)
+        if inotify is not None:
+            loop.remove_reader(inotify.fd)
+            os.close(inotify.fd)
+
+
+async def daemon_request(req: dict) -> bytes | None:
+    """Send one request to the running daemon; None if there isn't one."""
+    sock = daemon_socket_path()
+    if not _own_socket(sock):
+        return None
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_unix_connection(str(sock)), DAEMON_CONNECT_TIMEOUT)
+    except (OSError, asyncio.TimeoutError):
+        return None
+    try:
+        writer.write(json.dumps(req).encode() + b"\n")
+        await writer.drain()
+        return await reader.read()
+    except ConnectionError:
+        return None
+    finally:
+        writer.close()
+
+
+async def daemon_stream(sink: Sink, *, detailed: bool) -> bool:
+    """Serve rows from the daemon if one is running. Returns False to fall back to direct mode."""
+    data = await daemon_request({"op": "list", "detailed": detailed})
+    if not data:
+        return False
+    try:
+        await sink(data.decode())
+    except (BrokenPipeError, ConnectionResetError):
+        if sink is stdout_sink:
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+    return True
+
+
+async def cmd_daemon_ctl(action: str) -> None:
+    if action == "status":
+        data = await daemon_request({"op": "status"})
+        if data is None:
+            sys.exit("daemon not running")
+        info = json.loads(data)
+        print(f"pid {info['pid']}: {info['worktrees']} worktrees, {info['refreshes']} refreshes ({daemon_socket_path()})")
+    elif action == "stop":
+        if await daemon_request({"op": "stop"}) is None:
+            sys.exit("daemon not running")
+    else:
+        sys.exit(f"unknown daemon action: {action} (expected status|stop)")
+
+
 # -----------------------------------------------------------------------------
 # entry point
 # -----------------------------------------------------------------------------
 
+def _subcommand_name(args: argparse.Namespace) -> str:
+    if args.__list:
+        return "list"
+    if args.cmd in ("new", "checkout", "prune", "daemon", "dev", "pool", "reap", "du", "maintain"):
+        return args.cmd
+    if args.cmd == "co":
+        return "checkout"
+    if args.cmd:
+        return "lookup"
+    return "remove" if args.remove else "select"
+
+
+def enable_profile(args: argparse.Namespace) -> None:
+    TRACER.enabled = True
+    TRACER.subcommand = _subcommand_name(args)
+
+    def dump() -> None:
+        print(TRACER.report(), file=sys.stderr)
+        if args.profile_trace:
+            with open(args.profile_trace, "w") as f:
+                json.dump(TRACER.chrome_trace(), f)
+            print(f"trace written to {args.profile_trace}", file=sys.stderr)
+
+    atexit.register(dump)
+
+
 def main() -> None:
     require("git")
     require("fzf")
@@ -457,7 +3197,13 @@ commands:
   new <branch>      Create worktree for new or existing branch
   checkout <ref>    Checkout branch/commit into worktree (alias: co)
   dev [branch]      Run npm run dev in worktree (interactive if no branch)
-  prune             Remove worktrees fully synced with upstream
+  prune             Remove clean worktrees synced with upstream or merged
+  pool [fill [N]|clear]  Keep N checked-out worktrees ready for `new`
+  du [--sort ...]   Disk usage per worktree, biggest first
+  maintain          Enable commit-graph, untracked cache, index v4, fsmonitor;
+                    time the list before and after each
+  reap              Finish deleting removed worktrees (normally runs in background)
+  daemon [status|stop]  Serve the worktree list from a warm in-memory model
 
 examples:
   gwt                    Interactive worktree selector (cd into selection)
@@ -468,48 +3214,154 @@ examples:
   gwt -r                 Interactive remove worktree
   gwt -r -f              Remove worktree and force delete branch
   gwt prune              Remove fully-synced worktrees
+  gwt new feat --sparse apps/web libs/ui
+                         Check out only those directories (plus root files)
+  gwt pool fill 3        Pre-create 3 worktrees that `gwt new` can claim
 
 shell setup:
   To enable cd functionality, source the companion 'gwt' shell script:
     echo "source $(pwd)/gwt" >> ~/.zshrc
+  In zsh it also registers completion for subcommands and ref names.
 
 config:
   Set a custom root directory for worktrees (default: parent of repo):
     git config --global wt.root ~/worktrees
+
+  Check dirty state from the index without running git status (tracked
+  changes only; untracked files are not reported):
+    git config wt.fastStatus true
+
+  Clone heavy untracked directories from the main worktree into new
+  worktrees (default: node_modules), using reflinks where the filesystem
+  supports them (FICLONE on Linux, clonefile on macOS), else copies:
+    git config --add wt.provision node_modules
+    git config --add wt.provision .next/cache
+    git config wt.provisionMode auto   # reflink|hardlink|copy|off
+  hardlink is opt-in: hardlinked files are shared with the main worktree,
+  so in-place edits in one show up in the other.
+
+  Branch that prune treats as the merge target, including squash merges
+  (default: origin/HEAD, else the main worktree's branch), and how many
+  days back to look for squash merges (default 90):
+    git config wt.base origin/develop
+    git config wt.squashWindow 30
+
+  Removed worktrees are moved to <wt.root>/<repo>/.trash and deleted by a
+  background process; to delete in place with `git worktree remove`:
+    git config wt.trash false
+
+  Always show the selector's preview pane (same as --preview); summaries
+  are built in the background while fzf is open and cached per worktree:
+    git config wt.preview true
+
+  Show each worktree's disk usage in the list, as of the last measurement,
+  which is refreshed in the background (cached per directory by mtime;
+  see `gwt du`):
+    git config wt.showSize true
+
+  Check out only some directories in every new worktree (cone mode;
+  override per call with --sparse DIR... or --no-sparse):
+    git config wt.sparseProfile "apps/web libs/ui"
+
+  Keep a pool of pre-checked-out worktrees so `gwt new` only has to
+  switch branches; claimed entries are replaced in the background, and
+  entries older than maxAge (hours, default 72) are recreated:
+    git config wt.pool.size 2
+    git config wt.pool.maxAge 24
+
+  Limit how many git processes run at once (default: 2x CPUs, max 32):
+    git config wt.jobs 8
+
+cache:
+  Row status is cached in $GIT_COMMON_DIR/wt-status-cache.json, keyed by
+  HEAD, index and upstream fingerprints. Ref names for `new`, `checkout`
+  and --complete are cached in wt-refs-cache.json, keyed by the mtimes
+  of packed-refs and the directories under refs/. Use --no-cache to bypass it
+  (and any running daemon).
+
+daemon:
+  `git-wt.py daemon &` keeps every worktree's status warm, watching index
+  and HEAD files with inotify (polling elsewhere). The list and fzf reload
+  use it automatically while it is running.
+
+profiling:
+  --profile prints every git call (slowest first) with per-command totals
+  to stderr; --profile-trace FILE also writes a Chrome trace-event file
+  (open in chrome://tracing or ui.perfetto.dev) with one track per
+  concurrently running process.
+    gwt prune --dry-run --profile --profile-trace /tmp/gwt.json
 """,
     )
     ap.add_argument("-r", "--remove", action="store_true", help="remove selected worktree")
     ap.add_argument("-f", "--force", action="store_true", help="force (prune: skip confirm, -r: delete unmerged branch)")
     ap.add_argument("-n", "--no-interactive", action="store_true", help="non-interactive mode")
     ap.add_argument("--print-path", action="store_true", help="print path instead of cd")
+    ap.add_argument("--dry-run", action="store_true", help="prune: only list what would be removed; maintain: only show settings")
+    ap.add_argument("--no-provision", action="store_true", help="new/checkout: skip cloning wt.provision directories")
+    ap.add_argument("--sparse", nargs="+", metavar="DIR", help="new: cone-mode sparse checkout of DIRs only")
+    ap.add_argument("--no-sparse", action="store_true", help="new: full checkout even if wt.sparseProfile is set")
+    ap.add_argument("--sort", choices=("size", "name", "list"), default="size", help="du: row order (default: biggest first)")
+    ap.add_argument("--preview", action="store_true", help="show recent commits, diffstat and ahead/behind in fzf")
+    ap.add_argument("--no-cache", action="store_true", help="ignore and do not update the status cache")
+    ap.add_argument("--cache-stats", action="store_true", help="print status cache hit/miss counts to stderr")
+    ap.add_argument("--profile", action="store_true", help="print spawned processes, slowest first, to stderr")
+    ap.add_argument("--profile-trace", metavar="FILE", help="with --profile, also write a Chrome trace-event JSON file")
+    ap.add_argument("--complete", metavar="PREFIX", help="print branch, remote branch and tag names starting with PREFIX")
     ap.add_argument("--__list", action="store_true", help=argparse.SUPPRESS)
     ap.add_argument("--__detailed", action="store_true", help=argparse.SUPPRESS)
-    ap.add_argument("cmd", nargs="?", metavar="CMD", help="new|checkout|co|prune")
+    ap.add_argument("cmd", nargs="?", metavar="CMD", help="new|checkout|co|prune|dev|daemon|pool|reap|du|maintain")
     ap.add_argument("arg", nargs="?", metavar="ARG", help="branch name or ref")
+    ap.add_argument("rest", nargs="*", help=argparse.SUPPRESS)
 
     args = ap.parse_args()
+    use_cache = not args.no_cache
+    if args.complete is not None:
+        cmd_complete(args.complete)
+        return
+    if args.profile or args.profile_trace:
+        enable_profile(args)
+    if args.cache_stats:
+        atexit.register(
+            lambda: print(f"cache: {CACHE_STATS['hit']} hits, {CACHE_STATS['miss']} misses", file=sys.stderr)
+        )
 
     if args.__list:
-        rows = build_rows(include_upstream=args.__detailed)
-        if rows:
-            sys.stdout.write("\0".join(rows) + "\0")
+        run(list_rows(detailed=args.__detailed, use_cache=use_cache))
         return
 
     if args.cmd == "new":
         if not args.arg:
             sys.exit("branch name required")
-        cmd_new(args.arg)
+        run(cmd_new(args.arg, provision_deps=not args.no_provision, sparse=[] if args.no_sparse else args.sparse))
 
     elif args.cmd in ("checkout", "co"):
         if not args.arg:
             sys.exit("ref required")
-        cmd_checkout(args.arg)
+        run(cmd_checkout(args.arg, provision_deps=not args.no_provision))
 
     elif args.cmd == "prune":
-        cmd_prune(force=args.force or args.no_interactive)
+        run(cmd_prune(force=args.force or args.no_interactive, dry_run=args.dry_run))
+
+    elif args.cmd == "daemon":
+        if args.arg:
+            run(cmd_daemon_ctl(args.arg))
+        else:
+            run(cmd_daemon())
+
+    elif args.cmd == "maintain":
+        cmd_maintain(dry_run=args.dry_run)
+
+    elif args.cmd == "du":
+        run(cmd_du(args.sort, use_cache=use_cache))
+
+    elif args.cmd == "reap":
+        run(cmd_reap())
+
+    elif args.cmd == "pool":
+        run(cmd_pool([args.arg, *args.rest] if args.arg else []))
 
     elif args.cmd == "dev":
-        cmd_dev(args.arg)
+        run(cmd_dev(args.arg, use_cache=use_cache))
 
     else:
         if args.cmd and not args.arg:
@@ -524,7 +3376,8 @@ config:
                 print(Path.cwd())
                 return
             sys.exit("non-interactive mode requires explicit command")
-        interactive(args.remove, args.print_path, args.force)
+        preview = args.preview or config_bool("wt.preview")
+        run(interactive(args.remove, args.print_path, args.force, use_cache=use_cache, preview=preview))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+# Author: Abhijay Bhatnagar
+"""Switch, fetch and pull every matching repository in the current directory at once.
+
+Replaces the serial bash loop: each repository is handled on a bounded
+thread pool, every git call is bounded by the repository's remaining time,
+and the summary table is printed in directory order once all are done.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Tuple
+
+
+class C:
+    RED = "\033[0;31m"
+    GREEN = "\033[0;32m"
+    BLUE = "\033[0;36m"
+    YLW = "\033[38;5;227m"
+    DIM = "\033[90m"
+    NC = "\033[0m"
+
+
+SPACING = 24
+DEFAULT_JOBS = 8  # mostly waiting on the network, so not tied to CPU count
+DEFAULT_TIMEOUT = 120.0  # seconds per repository, fetch and pull included
+
+USAGE = f"""
+usage: {Path(sys.argv[0]).name} [-h] [-s REGEX] [-c REGEX] [-f] [-p] [-d] [-j N] [-t SECS] [branch]
+
+This command switches all "shr*" repositories to the given branch. If no branch is passed, it shows the current branch for each repo.
+
+Options:
+    -h
+        Displays help menu.
+    -s [regular expression]
+        Allows you to selectively manage repositories that match a regular expression. (Note: This defaults to "^.*", every repository in the current directory.)
+    -c [regular expression]
+        Allows you to selectively manage repositories that are currently on a matching branch.
+    -f
+        Fetches from origin.
+    -p
+        Pulls in changes from origin (only for repositories without uncommitted changes)
+    -d
+        Only show repositories that differ from origin.
+    -j [count]
+        Repositories to work on at once (default {DEFAULT_JOBS}).
+    -t [seconds]
+        Give up on a repository after this long (default {DEFAULT_TIMEOUT:.0f})."""
+
+BR_COLORS = f"""
+Key to branch colors:
+{C.GREEN}    Green {C.NC}= successfully changed
+{C.BLUE}    Blue {C.NC}= already on branch
+{C.RED}    Red {C.NC}= not changed, unstaged changes in current branch (or timed out)
+{C.NC}    No color = branch doesn't exist on repo"""
+
+STAR_HELP = f"""
+    * = uncommitted changes on branch
+    {C.YLW}*{C.NC} = branch out of sync with remote (could be local committed changes, or upstream changes; branch needs push and/or pull)
+    {C.RED}*{C.NC} = branch has uncommited local changes"""
+
+
+# -----------------------------------------------------------------------------
+# per-repository work
+# -----------------------------------------------------------------------------
+
+class RepoTimeout(Exception):
+    pass
+
+
+@dataclass
+class Repo:
+    name: str
+    deadline: float
+    output_br: str = ""
+    changed: str = ""
+    log: List[str] = field(default_factory=list)  # printed as one block when the repo finishes
+    seconds: float = 0.0
+
+    def git(self, *args: str, check: bool = False) -> subprocess.CompletedProcess[str]:
+        remaining = self.deadline - time.monotonic()
+        if remaining <= 0:
+            raise RepoTimeout(args[0])
+        try:
+            p = subprocess.run(
+                ["git", *args],
+                cwd=self.name,
+                text=True,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                timeout=remaining,
+                env={**os.environ, "GIT_TERMINAL_PROMPT": "0"},  # never block a worker on a credential prompt
+            )
+        except subprocess.TimeoutExpired:
+            raise RepoTimeout(args[0]) from None
+        if check and p.returncode != 0:
+            raise subprocess.CalledProcessError(p.returncode, p.args, p.stdout, p.stderr)
+        return p
+
+    def out(self, *args: str) -> str:
+        return self.git(*args).stdout.strip()
+
+
+def branch_names(repo: Repo) -> List[str]:
+    """Local branches, then origin's, like `git branch -a` with remotes/origin/ stripped."""
+    out = repo.out("for-each-ref", "--format=%(refname)", "refs/heads", "refs/remotes/origin")
+    names = []
+    for ref in out.splitlines():
+        if ref == "refs/remotes/origin/HEAD":
+            continue
+        names.append(ref.removeprefix("refs/heads/").removeprefix("refs/remotes/origin/"))
+    return names
+
+
+def switch(repo: Repo, old: str, wanted: str) -> None:
+    br_nostar = wanted.replace("*", "")
+    # closest matched branch, both local and remote
+    matched = next((n for n in branch_names(repo) if br_nostar in n), "")
+    br = wanted
+    if br and br.endswith("*") and matched.startswith(br[:-1]):
+        br = matched
+
+    # Leave alone: no branch requested, or it doesn't exist here locally or remotely
+    if not br or matched != br:
+        repo.output_br = old
+    elif br == old:
+        repo.output_br = f"{C.BLUE}{old}{C.NC}"
+    else:
+        repo.git("checkout", br)
+        now = repo.out("rev-parse", "--abbrev-ref", "HEAD")
+        repo.output_br = f"{C.GREEN if now == br else C.RED}{now}{C.NC}"
+
+
+def sync_state(repo: Repo) -> str:
+    """Yellow star plus ahead/behind when the branch differs from origin's copy."""
+    cur = repo.out("rev-parse", "--abbrev-ref", "HEAD")
+    remote = f"refs/remotes/origin/{cur}"
+    if repo.git("show-ref", "--verify", "--quiet", remote).returncode != 0:
+        return ""
+    if repo.git("diff", "--quiet", cur, remote).returncode == 0:
+        return ""
+    counts = repo.out("rev-list", "--left-right", "--count", f"{cur}...{remote}").split()
+    ahead, behind = (counts + ["0", "0"])[:2]
+    return f"{C.YLW}*{C.DIM} [{C.GREEN}{ahead}↟ {C.RED}{behind}↡{C.DIM}]{C.NC}"
+
+
+def process(name: str, args: argparse.Namespace) -> Repo | None:
+    """Everything the bash loop did for one repository. None when -c filters it out."""
+    t0 = time.monotonic()
+    repo = Repo(name, t0 + args.timeout)
+    step = "status"
+    try:
+        old = repo.out("rev-parse", "--abbrev-ref", "HEAD")
+        if args.select_branch and not re.search(args.select_branch, old):
+            return None
+        repo.output_br = old
+
+        if args.fetch:
+            step = "fetch"
+            repo.git("remote", "update", "origin", "--prune")
+
+        step = "checkout"
+        switch(repo, old, args.branch or "")
+
+        step = "status"
+        if repo.out("status", "-s"):
+            if args.pull:
+                repo.log.append(f"{C.RED}Skipping {name}{C.NC}")
+            repo.changed = f"{C.RED}*{C.NC}"
+        elif args.pull:
+            step = "pull"
+            repo.log.append(f"{C.YLW}Pulling {name}{C.NC}")
+            p = repo.git("pull")
+            repo.log.append((p.stdout + p.stderr).rstrip())
+
+        step = "status"
+        repo.changed += sync_state(repo)
+    except RepoTimeout:
+        repo.output_br = f"{C.RED}{repo.output_br or '?'} (timed out: {step}){C.NC}"
+        repo.changed = repo.changed or f"{C.RED}*{C.NC}"
+    repo.seconds = time.monotonic() - t0
+    return repo
+
+
+# -----------------------------------------------------------------------------
+# main
+# -----------------------------------------------------------------------------
+
+def repositories(prefix: str) -> List[str]:
+    return [
+        sub
+        for sub in sorted(os.listdir("."))
+        if re.search(prefix, sub) and (Path(sub) / ".git").is_dir()
+    ]
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(add_help=False, usage=argparse.SUPPRESS)
+    ap.add_argument("-h", action="store_true", dest="help")
+    ap.add_argument("-f", action="store_true", dest="fetch")
+    ap.add_argument("-p", action="store_true", dest="pull")
+    ap.add_argument("-d", action="store_true", dest="only_diffs")
+    ap.add_argument("-s", dest="prefix", default="^.*")
+    ap.add_argument("-c", dest="select_branch")
+    ap.add_argument("-j", dest="jobs", type=int, default=DEFAULT_JOBS)
+    ap.add_argument("-t", dest="timeout", type=float, default=DEFAULT_TIMEOUT)
+    ap.add_argument("branch", nargs="?")
+    args = ap.parse_args()
+
+    if args.help:
+        print(f"{USAGE}\n{BR_COLORS}\n{STAR_HELP}\n")
+        if len(sys.argv) == 2:
+            sys.exit(1)
+    if args.fetch:
+        print(f"{C.YLW}Fetching remotes{C.NC}")
+    if args.pull:
+        print(f"{C.YLW}Pulling clean remotes{C.NC}")
+    if args.only_diffs:
+        print(f"{C.YLW}Only showing repos with diffs{C.NC}")
+
+    names = repositories(args.prefix)
+    t0 = time.monotonic()
+    results: List[Tuple[str, Repo | None]] = []
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        futures = {pool.submit(process, name, args): name for name in names}
+        for fut, name in futures.items():
+            repo = fut.result()
+            results.append((name, repo))
+            if repo is not None and repo.log:
+                print(f"\n{C.DIM}---------------------------------{C.NC}")
+                print("\n".join(repo.log))
+
+    print()
+    for name, repo in results:
+        if repo is None or (args.only_diffs and not repo.changed):
+            continue
+        print(f"{name:<{SPACING}} [{repo.output_br}]{repo.changed} ")
+    print()
+    if names:
+        slowest = max((r for _, r in results if r is not None), key=lambda r: r.seconds, default=None)
+        note = f", slowest {slowest.name} {slowest.seconds:.1f}s" if slowest else ""
+        print(f"{C.DIM}{len(names)} repositories in {time.monotonic() - t0:.1f}s{note}{C.NC}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,172 @@
-import subprocess
 import sys
 import os.path
-import json
-import shutil
+import marshal
+# json, runpy, socket, subprocess, shutil and traceback are imported where
+# they're used, so that quick runs don't pay for them before the script starts
 
-with open("%s/%s" % (sys.path[0], 'script-aliases.json'), 'r') as f:
-    aliases = json.load(f)
+SCRIPT_DIR = sys.path[0]
+ALIAS_FILE = os.path.join(SCRIPT_DIR, 'script-aliases.json')
+CACHE_DIR = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'), 'run-script')
+INDEX_FILE = os.path.join(CACHE_DIR, 'index.marshal')
+INDEX_VERSION = 3
+TS_TOOLS_FILE = os.path.join(CACHE_DIR, 'typescript-tools.marshal')
+TS_CACHE_DIR = os.path.join(CACHE_DIR, 'typescript')
+TS_BUNDLE_VERSION = b'2'  # part of each bundle's key; bump when the esbuild flags change
+ZYGOTE_SOCKET = os.path.join(CACHE_DIR, 'zygote.sock')
+ZYGOTE_PID = os.path.join(CACHE_DIR, 'zygote.pid')
+ZYGOTE_LOG = os.path.join(CACHE_DIR, 'zygote.log')
+# Overridden by RUN_SCRIPT_PRELOAD (comma separated) or `--zygote start MODULE...`
+ZYGOTE_PRELOAD = ['subprocess', 'json', 'shutil', 'requests']
+
+# Bare names win over extensions, in the order the old isfile() probing tried them
+EXTENSIONS = ['.py', '.ts', '.tsx']
+
+def runner_for(scr):
+    if scr.endswith('.py'):
+        return 'python'
+    elif scr.endswith('.ts') or scr.endswith('.tsx'):
+        return 'typescript'
+    return 'bash'
+
+def index_key():
+    # mtime_ns changes whenever a script is added, removed or renamed in the
+    # directory, or the alias file is rewritten
+    def mtime(path):
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return 0
+    return [INDEX_VERSION, SCRIPT_DIR, mtime(SCRIPT_DIR), mtime(ALIAS_FILE)]
+
+def scan_scripts():
+    files = {}
+    with os.scandir(SCRIPT_DIR) as it:
+        for entry in it:
+            if entry.name.startswith('.') or not entry.is_file():
+                continue
+            runner = runner_for(entry.name)
+            # Bash-style scripts have to be executable to be run directly
+            if runner == 'bash' and not os.access(entry.path, os.X_OK):
+                continue
+            files[entry.name] = runner
+
+    scripts = {}
+    for name in sorted(files):
+        scripts[name] = {'path': name, 'runner': files[name]}
+    for ext in reversed(EXTENSIONS):
+        for name in files:
+            if name.endswith(ext) and name[:-len(ext)] not in files:
+                scripts[name[:-len(ext)]] = {'path': name, 'runner': files[name]}
+
+    import json
+    try:
+        with open(ALIAS_FILE, 'r') as f:
+            aliases = json.load(f)
+    except (OSError, ValueError):
+        aliases = {}
+    for alias, target in aliases.items():
+        # Either "alias": "script" or "alias": {"script": ..., "inproc": true}
+        opts = target if isinstance(target, dict) else {'script': target}
+        scripts[alias] = {'path': opts['script'], 'runner': runner_for(opts['script']), 'alias': True,
+                          'inproc': bool(opts.get('inproc'))}
+    return scripts
+
+def load_index(rebuild=False):
+    key = index_key()
+    try:
+        with open(INDEX_FILE, 'rb') as f:
+            cached = marshal.load(f)
+        if cached.get('key') == key and not rebuild:
+            return cached['scripts']
+    except (OSError, ValueError, EOFError, TypeError, AttributeError):
+        pass
+
+    scripts = scan_scripts()
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp = '%s.%d.tmp' % (INDEX_FILE, os.getpid())
+        with open(tmp, 'wb') as f:
+            marshal.dump({'key': key, 'scripts': scripts}, f)
+        os.replace(tmp, INDEX_FILE)
+    except OSError:
+        pass  # a read-only cache just means scanning every time
+    return scripts
+
+def probe_script(name):
+    # The old isfile() probing, for what the index can't know about: paths
+    # below the script directory, and a chmod +x since the last scan (which
+    # doesn't touch the directory's mtime)
+    for candidate in [name] + [name + ext for ext in EXTENSIONS]:
+        if os.path.isfile(script_path(candidate)):
+            return {'path': candidate, 'runner': runner_for(candidate)}
+    return None
+
+def fuzzy_score(query, name):
+    # Subsequence match: lower is better, None when the letters don't appear in order
+    pos = -1
+    gaps = 0
+    for ch in query:
+        nxt = name.find(ch, pos + 1)
+        if nxt < 0:
+            return None
+        gaps += nxt - pos - 1
+        pos = nxt
+    return gaps
+
+def visible_names(scripts):
+    # "foo" is offered, not "foo.py" as well, though both resolve
+    names = []
+    for name in sorted(scripts):
+        stem = os.path.splitext(name)[0]
+        if stem != name and scripts.get(stem, {}).get('path') == name:
+            continue
+        names.append(name)
+    return names
+
+def complete(scripts, prefix):
+    prefix = prefix.lower()
+    names = visible_names(scripts)
+    matches = [n for n in names if n.lower().startswith(prefix)]
+    if matches or not prefix:
+        return matches
+    scored = []
+    for n in names:
+        score = fuzzy_score(prefix, n.lower())
+        if score is not None:
+            scored.append((score, len(n), n))
+    return [n for _, _, n in sorted(scored)]
+
+def list_scripts(scripts):
+    width = max([len(n) for n in scripts] + [0])
+    for name in visible_names(scripts):
+        entry = scripts[name]
+        if entry.get('alias'):
+            print('%-*s  %-10s  -> %s%s' % (width, name, entry['runner'], entry['path'],
+                                            ' (inproc)' if entry.get('inproc') else ''))
+        else:
+            print('%-*s  %-10s  %s' % (width, name, entry['runner'], script_path(entry['path'])))
 
 def script_path(scr):
     if os.path.isabs(scr):
         return scr
     return os.path.abspath("%s/%s" % (sys.path[0], scr))
 
-def call_script(scr):
+def call_script(scr, runner=None, inproc=False):
+    runner = runner or runner_for(scr)
+    code = zygote_call(scr) if runner == 'python' else None
+    if code is None and runner == 'python' and inproc:
+        code = run_python_inproc(scr)
+    if code is not None:
+        if code:
+            print("Error running script '%s': exit status %d" % (scr, code))
+            sys.exit(code)
+        return
+
+    import subprocess
     try:
-        if scr.endswith('.py'):
+        if runner == 'python':
             call_python_script(scr)
-        elif scr.endswith('.ts') or scr.endswith('.tsx'):
+        elif runner == 'typescript':
             call_typescript_script(scr)
         else:
             call_bash_script(scr)
@@ -32,46 +182,636 @@ def call_script(scr):
 
 
 def call_bash_script(scr):
+    import subprocess
     subprocess.check_call([script_path(scr)] + sys.argv[2:])
 
 def call_python_script(scr):
+    import subprocess
     subprocess.check_call([sys.executable, script_path(scr)] + sys.argv[2:])
 
-def call_typescript_script(scr):
+def run_python_inproc(scr):
+    # Same as `python scr args...`, minus a second interpreter startup: the
+    # script gets its own argv, its directory as sys.path[0] and a fresh
+    # __main__ (run_path swaps sys.modules['__main__'] for the duration)
+    import runpy
     full_path = script_path(scr)
+    argv, path = sys.argv, sys.path[:]
+    sys.argv = [full_path] + argv[2:]
+    sys.path[0] = os.path.dirname(full_path)
+    code = 0
+    try:
+        runpy.run_path(full_path, run_name='__main__')
+    except SystemExit as e:
+        # Map exit codes the way the interpreter does: None is 0, other
+        # non-integers are printed and become 1
+        if e.code is None:
+            code = 0
+        elif isinstance(e.code, int):
+            code = e.code
+        else:
+            print(e.code, file=sys.stderr)
+            code = 1
+    except KeyboardInterrupt:
+        import traceback
+        traceback.print_exc()
+        code = 130
+    except Exception:
+        import traceback
+        traceback.print_exc()
+        code = 1
+    finally:
+        sys.argv, sys.path[:] = argv, path
+        sys.stdout.flush()
+    return code
 
-    tsx = shutil.which("tsx")
+def path_fingerprint():
+    # PATH plus each directory's mtime, so installing or removing a tool
+    # anywhere on PATH invalidates what we resolved
+    fp = []
+    for d in os.environ.get('PATH', '').split(os.pathsep):
+        try:
+            fp.append((d, os.stat(d).st_mtime_ns))
+        except OSError:
+            fp.append((d, 0))
+    return fp
+
+def resolve_typescript_tools():
+    import shutil
+    esbuild = shutil.which('esbuild')
+    tools = {'runner': None, 'node': shutil.which('node'), 'esbuild': [esbuild] if esbuild else None}
+    tsx = shutil.which('tsx')
+    pnpm = shutil.which('pnpm')
+    npx = shutil.which('npx')
     if tsx:
-        subprocess.check_call([tsx, full_path] + sys.argv[2:])
-        return
+        tools['runner'] = [tsx]
+        # tsx ships with esbuild, usually right beside it in node_modules/.bin
+        sibling = os.path.join(os.path.dirname(tsx), 'esbuild')
+        if not esbuild and os.access(sibling, os.X_OK):
+            tools['esbuild'] = [sibling]
+    elif pnpm:
+        tools['runner'] = [pnpm, 'dlx', 'tsx']
+        tools['esbuild'] = tools['esbuild'] or [pnpm, 'dlx', 'esbuild']
+    elif npx:
+        tools['runner'] = [npx, '--yes', 'tsx']
+        # Fetching esbuild once per changed script beats fetching tsx every run
+        tools['esbuild'] = tools['esbuild'] or [npx, '--yes', 'esbuild']
+    return tools
+
+def typescript_tools():
+    fp = path_fingerprint()
+    try:
+        with open(TS_TOOLS_FILE, 'rb') as f:
+            cached = marshal.load(f)
+        if cached.get('key') == [INDEX_VERSION, fp] and all(
+                tool is None or os.path.exists(tool if isinstance(tool, str) else tool[0])
+                for tool in cached['tools'].values()):
+            return cached['tools']
+    except (OSError, ValueError, EOFError, TypeError, AttributeError):
+        pass
+
+    tools = resolve_typescript_tools()
+    write_cache(TS_TOOLS_FILE, {'key': [INDEX_VERSION, fp], 'tools': tools})
+    return tools
+
+def write_cache(path, value):
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = '%s.%d.tmp' % (path, os.getpid())
+        with open(tmp, 'wb') as f:
+            marshal.dump(value, f)
+        os.replace(tmp, path)
+    except OSError:
+        pass  # a read-only cache just means redoing the work every time
+
+def transpiled(full_path, tools):
+    # Path of a cached bundle of the script, built with esbuild when the
+    # script's content has changed, or None to use the tsx runner instead
+    if not tools['node'] or not tools['esbuild']:
+        return None
+    import hashlib
+    try:
+        with open(full_path, 'rb') as f:
+            digest = hashlib.sha256(TS_BUNDLE_VERSION + b'\0' + full_path.encode() + b'\0' + f.read()).hexdigest()
+    except OSError:
+        return None
+    out = os.path.join(TS_CACHE_DIR, digest + '.cjs')
+    meta_file = os.path.join(TS_CACHE_DIR, digest + '.meta')
+
+    # The entry point is covered by the hash; files it imports are checked
+    # by mtime and size, which is enough to notice an edit
+    try:
+        with open(meta_file, 'rb') as f:
+            meta = marshal.load(f)
+        if meta.get('failed') == tools['esbuild']:
+            return None
+        if meta.get('inputs') is not None and os.path.exists(out) and all(
+                stat_key(path) == key for path, key in meta['inputs']):
+            return out
+    except (OSError, ValueError, EOFError, TypeError, AttributeError):
+        pass
 
-    pnpm = shutil.which("pnpm")
-    if pnpm:
-        subprocess.check_call([pnpm, "dlx", "tsx", full_path] + sys.argv[2:])
+    import json
+    import subprocess
+    os.makedirs(TS_CACHE_DIR, exist_ok=True)
+    metafile = '%s.%d.json' % (out, os.getpid())
+    tmp = '%s.%d.tmp' % (out, os.getpid())
+    dirname = os.path.dirname(full_path)
+    # Bundled code runs from the cache, so point __dirname and friends back
+    # at the script. esbuild applies defines to every bundled file, so this
+    # is only right while no other file uses them (checked below). Packages
+    # stay external and keep their own __dirname; node finds them through
+    # NODE_PATH (see node_path).
+    defines = {'__dirname': dirname, '__filename': full_path, 'import.meta.url': 'file://' + full_path,
+               'import.meta.dirname': dirname, 'import.meta.filename': full_path}
+    cmd = tools['esbuild'] + [full_path, '--bundle', '--packages=external', '--platform=node', '--format=cjs',
+           '--sourcemap=inline', '--log-level=error', '--outfile=' + tmp, '--metafile=' + metafile]
+    # A require() esbuild can't resolve would resolve against the cache at run time
+    cmd += ['--log-override:%s=error' % w for w in ('unsupported-require-call', 'indirect-require',
+                                                    'unsupported-dynamic-import')]
+    cmd += ['--define:%s=%s' % (k, json.dumps(v)) for k, v in defines.items()]
+    try:
+        subprocess.check_call(cmd, cwd=dirname, stdout=subprocess.DEVNULL)
+        with open(metafile, 'r') as f:
+            inputs = json.load(f)['inputs']
+        paths = [os.path.normpath(os.path.join(dirname, p)) for p in inputs]
+        if any(uses_location(p) for p in paths if p != full_path):
+            raise ValueError('an imported file uses __dirname or import.meta')
+        os.replace(tmp, out)
+    except (OSError, ValueError, KeyError, subprocess.CalledProcessError):
+        # Not everything bundles (top-level await, native addons); don't keep trying
+        write_cache(meta_file, {'failed': tools['esbuild']})
+        return None
+    finally:
+        for path in (metafile, tmp):
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+    write_cache(meta_file, {'inputs': [(p, stat_key(p)) for p in paths]})
+    return out
+
+def uses_location(path):
+    import re
+    with open(path, 'r', errors='replace') as f:
+        return re.search(r'\b__dirname\b|\b__filename\b|\bimport\.meta\b', f.read()) is not None
+
+def node_path(full_path):
+    # Every node_modules from the script's directory up, as node would search
+    # them for a file at the script's own location
+    dirs = []
+    d = os.path.dirname(full_path)
+    while True:
+        if os.path.basename(d) != 'node_modules':
+            dirs.append(os.path.join(d, 'node_modules'))
+        parent = os.path.dirname(d)
+        if parent == d:
+            break
+        d = parent
+    if os.environ.get('NODE_PATH'):
+        dirs.append(os.environ['NODE_PATH'])
+    return os.pathsep.join(dirs)
+
+def stat_key(path):
+    try:
+        st = os.stat(path)
+        return (st.st_mtime_ns, st.st_size)
+    except OSError:
+        return None
+
+def call_typescript_script(scr):
+    import subprocess
+    full_path = script_path(scr)
+    tools = typescript_tools()
+
+    js = transpiled(full_path, tools)
+    if js:
+        env = dict(os.environ, NODE_PATH=node_path(full_path))
+        subprocess.check_call([tools['node'], '--enable-source-maps', js] + sys.argv[2:], env=env)
         return
 
-    npx = shutil.which("npx")
-    if npx:
-        subprocess.check_call([npx, "--yes", "tsx", full_path] + sys.argv[2:])
+    if tools['runner']:
+        subprocess.check_call(tools['runner'] + [full_path] + sys.argv[2:])
         return
 
     raise SystemExit("TypeScript runner not found. Install `tsx` (recommended) or `pnpm`/`npx`.")
 
-#script = aliases[sys.argv[1]]
+# -----------------------------------------------------------------------------
+# zygote: a warm interpreter that forks a child per Python script
+# -----------------------------------------------------------------------------
+
+def recv_exact(sock, n):
+    data = b''
+    while len(data) < n:
+        chunk = sock.recv(n - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+def recv_int(sock):
+    data = recv_exact(sock, 4)
+    return None if data is None else int.from_bytes(data, 'big', signed=True)
+
+def zygote_call(scr):
+    # Exit code of the script run by the zygote, or None when no zygote is
+    # running and the caller should start the script itself
+    if not os.path.exists(ZYGOTE_SOCKET):
+        return None
+    import socket
+    import signal
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(ZYGOTE_SOCKET)
+        payload = marshal.dumps({'script': script_path(scr), 'argv': sys.argv,
+                                 'cwd': os.getcwd(), 'env': dict(os.environ)})
+        socket.send_fds(sock, [len(payload).to_bytes(4, 'big')], [0, 1, 2])
+        sock.sendall(payload)
+        pid = recv_int(sock)
+    except OSError:
+        pid = None
+    if pid is None:
+        sock.close()
+        return None
+
+    # The child isn't in this terminal's process group, so pass on what the
+    # terminal sends us
+    def forward(signum, frame):
+        try:
+            os.kill(pid, signum)
+        except OSError:
+            pass
+    for signum in (signal.SIGINT, signal.SIGTERM, signal.SIGHUP, signal.SIGQUIT):
+        signal.signal(signum, forward)
+    code = recv_int(sock)
+    sock.close()
+    if code is None:
+        print("zygote child %d exited without a status" % pid, file=sys.stderr)
+        return 1
+    return code
+
+def zygote_child(conn):
+    # Runs in the forked child and never returns
+    import signal
+    import socket
+    code = 1
+    try:
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        header, fds, _, _ = socket.recv_fds(conn, 4, 3)
+        if len(header) < 4:
+            rest = recv_exact(conn, 4 - len(header)) if header else None
+            if rest is None:
+                os._exit(0)  # `--zygote status` just checking we're alive
+            header += rest
+        request = marshal.loads(recv_exact(conn, int.from_bytes(header, 'big')))
+
+        for target, fd in zip((0, 1, 2), fds):
+            os.dup2(fd, target)
+            os.close(fd)
+        # Re-open the standard streams so buffering matches the caller's
+        # terminal rather than the zygote's log file
+        sys.stdin = sys.__stdin__ = open(0, 'r', closefd=False)
+        sys.stdout = sys.__stdout__ = open(1, 'w', buffering=1 if os.isatty(1) else -1, closefd=False)
+        sys.stderr = sys.__stderr__ = open(2, 'w', buffering=1, closefd=False)
+        os.chdir(request['cwd'])
+        os.environ.clear()
+        os.environ.update(request['env'])
+        sys.argv = request['argv']
+
+        conn.sendall(os.getpid().to_bytes(4, 'big', signed=True))
+        code = run_python_inproc(request['script'])
+        import atexit
+        atexit._run_exitfuncs()
+    except BaseException:
+        import traceback
+        traceback.print_exc()
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            conn.sendall(code.to_bytes(4, 'big', signed=True))
+        except (OSError, OverflowError):
+            pass
+        os._exit(code & 0xff)
+
+def zygote_serve(modules):
+    import importlib
+    import runpy
+    import signal
+    import socket
+    import traceback
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            print("zygote: not preloading %s: %s" % (name, e), file=sys.stderr)
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    try:
+        os.unlink(ZYGOTE_SOCKET)
+    except OSError:
+        pass
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    umask = os.umask(0o177)  # only this user may hand us scripts to run
+    try:
+        server.bind(ZYGOTE_SOCKET)
+    finally:
+        os.umask(umask)
+    server.listen(32)
+    with open(ZYGOTE_PID, 'w') as f:
+        f.write('%d\n' % os.getpid())
+
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)  # children are reaped by the kernel
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    print("zygote: pid %d listening on %s, preloaded %s" % (os.getpid(), ZYGOTE_SOCKET, ', '.join(modules)))
+    try:
+        while True:
+            conn, _ = server.accept()
+            sys.stdout.flush()
+            sys.stderr.flush()
+            if os.fork() == 0:
+                server.close()
+                zygote_child(conn)
+            conn.close()
+    finally:
+        for path in (ZYGOTE_SOCKET, ZYGOTE_PID):
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+def zygote_pid():
+    try:
+        with open(ZYGOTE_PID, 'r') as f:
+            pid = int(f.read())
+        os.kill(pid, 0)
+        return pid
+    except (OSError, ValueError):
+        return None
+
+def zygote_command(args):
+    import time
+    action = args[0] if args else 'status'
+    modules = args[1:] or [m for m in os.environ.get('RUN_SCRIPT_PRELOAD', '').split(',') if m] or ZYGOTE_PRELOAD
+    pid = zygote_pid()
+    if action == 'serve':
+        zygote_serve(modules)
+    elif action == 'start':
+        if pid:
+            print("zygote already running (pid %d)" % pid)
+            return
+        import subprocess
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(ZYGOTE_LOG, 'a') as log:
+            subprocess.Popen([sys.executable, os.path.abspath(__file__), '--zygote', 'serve'] + modules,
+                             stdin=subprocess.DEVNULL, stdout=log, stderr=log, start_new_session=True)
+        for _ in range(100):
+            if zygote_pid() and os.path.exists(ZYGOTE_SOCKET):
+                print("zygote started (pid %d)" % zygote_pid())
+                return
+            time.sleep(0.05)
+        sys.exit("zygote didn't start, see %s" % ZYGOTE_LOG)
+    elif action == 'stop':
+        if not pid:
+            print("zygote not running")
+            return
+        os.kill(pid, 15)
+        for _ in range(100):
+            if not zygote_pid():
+                break
+            time.sleep(0.05)
+        print("zygote stopped (pid %d)" % pid)
+    elif action == 'status':
+        print("zygote running (pid %d)" % pid if pid else "zygote not running")
+    else:
+        sys.exit("usage: run-script --zygote [start|stop|status|serve] [MODULE...]")
+
+# -----------------------------------------------------------------------------
+# batches: --parallel and --plan
+# -----------------------------------------------------------------------------
+
+PREFIX_COLORS = ['\033[0;36m', '\033[0;32m', '\033[38;5;227m', '\033[0;35m', '\033[0;34m', '\033[0;33m']
+GREEN = '\033[0;32m'
+RED = '\033[0;31m'
+DIM = '\033[90m'
+NC = '\033[0m'
+DEFAULT_JOBS = 8  # scripts mostly wait on the network and other processes, not the CPU
+
+def batch_step(run, after=()):
+    import shlex
+    argv = shlex.split(run) if isinstance(run, str) else list(run)
+    return {'argv': argv, 'after': list(after)}
+
+def parallel_steps(items):
+    # `--parallel fix-displays "sa -f"`: each item is a script and its arguments
+    steps = {}
+    for item in items:
+        step = batch_step(item)
+        name = step['argv'][0]
+        n = 2
+        while name in steps:
+            name = '%s#%d' % (step['argv'][0], n)
+            n += 1
+        steps[name] = step
+    return steps
+
+def load_plan(path):
+    # {"displays": "fix-displays", "branches": {"run": "sa -f", "after": ["displays"]}}
+    import json
+    with open(path, 'r') as f:
+        plan = json.load(f)
+    steps = {}
+    for name, step in plan.items():
+        if isinstance(step, dict):
+            steps[name] = batch_step(step['run'], step.get('after', []))
+        else:
+            steps[name] = batch_step(step)
+    return steps
+
+def check_steps(steps, scripts):
+    problems = []
+    for name, step in steps.items():
+        if not step['argv']:
+            problems.append("%s: nothing to run" % name)
+        elif step['argv'][0] not in scripts:
+            problems.append("%s: unable to find script %s" % (name, step['argv'][0]))
+        for dep in step['after']:
+            if dep not in steps:
+                problems.append("%s: runs after unknown step %s" % (name, dep))
+
+    # Kahn's algorithm; whatever never becomes ready is on a cycle
+    waiting = dict((name, set(step['after']) & set(steps)) for name, step in steps.items())
+    while True:
+        ready = [name for name, deps in waiting.items() if not deps]
+        if not ready:
+            break
+        for name in ready:
+            del waiting[name]
+        for deps in waiting.values():
+            deps.difference_update(ready)
+    if waiting:
+        problems.append("dependency cycle between %s" % ', '.join(sorted(waiting)))
+    if problems:
+        sys.exit('\n'.join(problems))
+
+def run_batch(steps, jobs):
+    import subprocess
+    import threading
+    import time
+    from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+    color = sys.stdout.isatty()
+    width = max(len(name) for name in steps)
+    lock = threading.Lock()
+    procs = {}
+    results = {}  # name -> (exit code, or None when skipped, seconds)
+
+    def pump(pipe, out, prefix):
+        # Whole lines only, under one lock, so scripts can't interleave mid-line
+        for line in iter(pipe.readline, b''):
+            if not line.endswith(b'\n'):
+                line += b'\n'
+            with lock:
+                out.write(prefix + line)
+                out.flush()
+        pipe.close()
+
+    def run_step(name, index):
+        label = name.ljust(width)
+        if color:
+            label = PREFIX_COLORS[index % len(PREFIX_COLORS)] + label + NC
+        prefix = ('%s | ' % label).encode()
+        # Each step goes back through the dispatcher, so aliases, the zygote
+        # and the TypeScript cache all apply
+        argv = [sys.executable, os.path.abspath(__file__)] + steps[name]['argv']
+        env = dict(os.environ, PYTHONUNBUFFERED='1')
+        t0 = time.monotonic()
+        p = subprocess.Popen(argv, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=env)
+        procs[name] = p
+        err = threading.Thread(target=pump, args=(p.stderr, sys.stderr.buffer, prefix))
+        err.start()
+        pump(p.stdout, sys.stdout.buffer, prefix)
+        err.join()
+        return p.wait(), time.monotonic() - t0
+
+    order = list(steps)
+    pending = list(order)
+    running = {}
+    t0 = time.monotonic()
+    try:
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            while pending or running:
+                changed = True
+                while changed:
+                    changed = False
+                    for name in list(pending):
+                        deps = steps[name]['after']
+                        if any(d in results and results[d][0] != 0 for d in deps):
+                            results[name] = (None, 0.0)  # something it needs failed
+                            pending.remove(name)
+                            changed = True
+                        elif len(running) < jobs and all(d in results for d in deps):
+                            running[pool.submit(run_step, name, order.index(name))] = name
+                            pending.remove(name)
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    results[running.pop(fut)] = fut.result()
+    except KeyboardInterrupt:
+        for p in procs.values():
+            if p.poll() is None:
+                p.terminate()
+        sys.exit(130)
+
+    print()
+    failed = 0
+    for name in order:
+        code, seconds = results[name]
+        if code is None:
+            status, hue = 'skipped', DIM
+        elif code == 0:
+            status, hue = 'ok', GREEN
+        else:
+            status, hue = 'exit %d' % code, RED
+            failed += 1
+        if not color:
+            hue = ''
+        print('%-*s  %s%-8s%s  %6.1fs' % (width, name, hue, status, NC if hue else '', seconds))
+    skipped = len([1 for code, _ in results.values() if code is None])
+    print('%d steps in %.1fs, %d failed, %d skipped' % (len(order), time.monotonic() - t0, failed, skipped))
+    if failed or skipped:
+        sys.exit(1)
+
+def batch_command(mode, args):
+    if mode == '--plan':
+        usage = "usage: run-script --plan FILE [-j N]"
+    else:
+        usage = "usage: run-script --parallel [-j N] SCRIPT..."
+    jobs = DEFAULT_JOBS
+    rest = []
+    while args:
+        arg = args.pop(0)
+        if arg in ('-j', '--jobs'):
+            if not args or not args[0].isdigit() or int(args[0]) < 1:
+                sys.exit(usage)
+            jobs = int(args.pop(0))
+        else:
+            rest.append(arg)
+    if mode == '--plan':
+        if len(rest) != 1:
+            sys.exit(usage)
+        steps = load_plan(rest[0])
+    else:
+        if not rest:
+            sys.exit(usage)
+        steps = parallel_steps(rest)
+    check_steps(steps, load_index())
+    run_batch(steps, jobs)
+
+USAGE = '''usage: run-script SCRIPT [ARG...]
+       run-script --inproc SCRIPT [ARG...]      run a .py script inside the dispatcher
+       run-script --list | --complete PREFIX
+       run-script --parallel [-j N] SCRIPT...   e.g. --parallel fix-displays "sa -f"
+       run-script --plan FILE [-j N]            steps with "after" dependencies, as JSON
+       run-script --zygote start|stop|status|serve [MODULE...]'''
+
+inproc = False
+if (len(sys.argv) > 1 and sys.argv[1] == '--inproc'):
+    # Drop the flag so sys.argv[1] is the script and sys.argv[2:] its arguments
+    inproc = True
+    del sys.argv[1]
+
 if (len(sys.argv) > 1):
     script = sys.argv[1]
-    if (script in aliases):
-        script = aliases[sys.argv[1]]
-        call_script(script)
-    elif (os.path.isfile("%s/%s" % (sys.path[0], script))):
-        call_script(script)
-    elif (os.path.isfile("%s/%s.py" % (sys.path[0], script))):
-        call_script(script + '.py')
-    elif (os.path.isfile("%s/%s.ts" % (sys.path[0], script))):
-        call_script(script + '.ts')
-    elif (os.path.isfile("%s/%s.tsx" % (sys.path[0], script))):
-        call_script(script + '.tsx')
+    if (script == '--list'):
+        list_scripts(load_index())
+    elif (script == '--parallel' or script == '--plan'):
+        batch_command(script, sys.argv[2:])
+    elif (script == '--zygote'):
+        zygote_command(sys.argv[2:])
+    elif (script == '--complete'):
+        for name in complete(load_index(), sys.argv[2] if len(sys.argv) > 2 else ''):
+            print(name)
     else:
-        print("Unable to find script %s" % (script))
+        scripts = load_index()
+        entry = scripts.get(script)
+        if (entry is None):
+            entry = probe_script(script)
+            # Only worth a rescan if the index would now pick it up
+            if (entry is not None and '/' not in script and
+                    (entry['runner'] != 'bash' or os.access(script_path(entry['path']), os.X_OK))):
+                load_index(rebuild=True)
+        if (entry is not None):
+            call_script(entry['path'], entry['runner'], inproc or entry.get('inproc', False))
+        else:
+            print("Unable to find script %s" % (script))
+            close = complete(scripts, script)[:3]
+            if close:
+                print("Did you mean: %s" % (', '.join(close)))
+            sys.exit(1)
 else:
     print('No script specified')
+    print(USAGE)